@@ -6,18 +6,17 @@ import subprocess
 import os
 import sys
 from pathlib import Path
-from time import time as perf_time
 import threading
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 import queue
 import time
-import json # For ffprobe output
 import traceback # For detailed error logging
+import math
 
 # --- Pillow and OpenCV ---
 try:
-    from PIL import Image, ImageDraw, ImageFont, ImageTk
+    from PIL import Image, ImageTk
 except ImportError:
     messagebox.showerror("Dependency Error", "Pillow library is not installed. Please install it (pip install Pillow).")
     sys.exit(1)
@@ -28,57 +27,28 @@ except ImportError:
     messagebox.showerror("Dependency Error", "OpenCV library (cv2) is not installed. Please install it (pip install opencv-python).")
     sys.exit(1)
 
-# --- Constants ---
-SETTINGS_FILE = "Settings.ini"
-DEFAULT_OUTPUT_RELPATH = "Output_Videos_Images"
-APP_NAME = "Batch_VideoSubFinder V2.0.3"
-VERSION_INFO = "Programmed by Youtube@MrGamesKingPro"
-VIDEO_FILE_EXTENSIONS = {".mp4", ".mkv", ".avi", ".mov", ".flv", ".wmv"} # Common video extensions
-
-# --- FFprobe Path ---
-FFPROBE_PATH = "ffmpeg/ffprobe.exe" # Ensure ffprobe is in system PATH or provide full path
-
-# --- Default Settings (if Settings.ini is missing) ---
-DEFAULT_SETTINGS = {
-    "Path": {
-        "videosubfinder_path": "VideoSubFinderWXW.exe",
-        "Videos_path": "Paste_Multi_Videos_Here",
-        "general_settings": "general.cfg", # Default name for general.cfg
-        "output_path": DEFAULT_OUTPUT_RELPATH,
-    },
-    "Settings": {
-        "mode_open_video": "-ovffmpeg",
-        "create_cleared_text_images": "-ccti",
-        "start_time": "",
-        "end_time": "",
-        "use_cuda": "",
-        "number_threads_rgbimages": "",
-        "number_threads_txtimages": "",
-    }
-}
-
-# Default values for general.cfg crop settings (VSF standard)
-DEFAULT_CROP_SETTINGS = {
-    "top_video_image_percent_end": "0.258929",
-    "bottom_video_image_percent_end": "0",
-    "left_video_image_percent_end": "0",
-    "right_video_image_percent_end": "1",
-}
-# Order for adding to a new/empty general.cfg
-CROP_SETTING_KEYS_ORDER = [
-    "top_video_image_percent_end",
-    "bottom_video_image_percent_end",
-    "left_video_image_percent_end",
-    "right_video_image_percent_end",
-]
-
-# --- Helper: Get base path for resources (for PyInstaller) ---
-def get_base_path():
-    if getattr(sys, 'frozen', False): # PyInstaller
-        return Path(sys.executable).parent
-    return Path(__file__).parent # Script execution
-
-BASE_PATH = get_base_path()
+# --- Shared batch pipeline (Tk-free, also used by the headless CLI) ---
+from vsf_batch import (
+    SETTINGS_FILE, DEFAULT_OUTPUT_RELPATH, APP_NAME, VERSION_INFO, VIDEO_FILE_EXTENSIONS, FFPROBE_PATH,
+    DEFAULT_SETTINGS, DEFAULT_CROP_SETTINGS, CROP_SETTING_KEYS_ORDER, BASE_PATH,
+    JOB_ORDER_POLICIES, BatchConfigError, BatchRunner, ProbeError, get_probe_cache, get_ffprobe_command, tool_not_found_message,
+    CROP_PROFILES_FILENAME, CropProfiles, find_video_files, format_size, resolution_key,
+)
+from vsf_preview import (
+    PREVIEW_BACKENDS, THUMBNAIL_SIZE, LatestRequestWorker, ThumbnailLoader, fit_size, frame_bucket, get_frame_cache,
+    get_keyframe_index, open_frame_source, preceding_keyframe_ms,
+)
+from vsf_analysis import build_contact_sheet, detect_subtitle_band
+
+# --- Main window log ---
+LOG_DRAIN_INTERVAL_MS = 100
+LOG_MAX_LINES_PER_TICK = 300 # Lines taken from the queue per drain; the rest waits for the next ticks
+LOG_SCROLLBACK_LINES = 5000 # The textbox keeps only the newest lines...
+LOG_TRIM_SLACK = 500 # ...trimmed in chunks so the delete doesn't run on every tick
+LOG_SPILL_FILENAME = "Batch_VideoSubFinder.log" # Full session log next to the script (previous session kept as .1)
+OUTPUT_PROGRESS_REFRESH_MS = 1000 # How often the image counters line under "Output Log" is redrawn
+FRAME_STEP_LARGE = 10 # Frames moved by Shift+Left/Right in the crop editor
+THUMBNAIL_NAME_CHARS = 22 # File names under the crop editor's thumbnails are shortened to this length
 
 # --- VideoFrameLabelCTK: Handles visual crop line display and interaction ---
 class VideoFrameLabelCTK:
@@ -86,8 +56,14 @@ class VideoFrameLabelCTK:
         self.master_widget = master_widget
         self.lines_changed_callback = lines_changed_callback
 
-        self.label = ctk.CTkLabel(master_widget, text="", width=width, height=height)
-        self.label.pack(fill="both", expand=True, padx=5, pady=5)
+        # Canvas with one image item for the frame and separate line items, so moving a line never touches the image
+        self.canvas = ctk.CTkCanvas(master_widget, width=width, height=height, bg="black", highlightthickness=0)
+        self.canvas.pack(fill="both", expand=True, padx=5, pady=5)
+        self.image_item = self.canvas.create_image(0, 0, anchor="nw", state="hidden")
+        self.line_items = {line: self.canvas.create_line(0, 0, 0, 0, fill="lime", width=2, state="hidden")
+                           for line in ("top", "bottom", "left", "right")}
+        self.placeholder_item = self.canvas.create_text(width // 2, height // 2, text="No video loaded / Seek to display frame",
+                                                        fill="white", font=("Arial", 16))
 
         self.widget_width = width
         self.widget_height = height
@@ -99,7 +75,9 @@ class VideoFrameLabelCTK:
         self.offset_y = 0
 
         self.current_pil_image = None
-        self.display_ctk_image = None
+        self.base_photo = None # Scaled frame shown on the canvas...
+        self.base_source_image = None # ...and the frame and size it was made from
+        self.base_size = (0, 0)
 
         self.line_top_y_vid = 0
         self.line_bottom_y_vid = 0
@@ -112,11 +90,11 @@ class VideoFrameLabelCTK:
         self.dragging_line = None
         self.grab_margin = 10
 
-        self.label.bind("<ButtonPress-1>", self._mouse_press)
-        self.label.bind("<B1-Motion>", self._mouse_move)
-        self.label.bind("<ButtonRelease-1>", self._mouse_release)
-        self.label.bind("<Motion>", self._mouse_hover_cursor)
-        self.label.bind("<Configure>", self._on_label_configure)
+        self.canvas.bind("<ButtonPress-1>", self._mouse_press)
+        self.canvas.bind("<B1-Motion>", self._mouse_move)
+        self.canvas.bind("<ButtonRelease-1>", self._mouse_release)
+        self.canvas.bind("<Motion>", self._mouse_hover_cursor)
+        self.canvas.bind("<Configure>", self._on_label_configure)
 
         # Initialize with no image
         self.set_pil_image(None)
@@ -172,36 +150,11 @@ class VideoFrameLabelCTK:
         # print(f"DEBUG: set_pil_image called. Has image: {pil_image is not None}. Video dims: {self.video_width}x{self.video_height}")
         self.current_pil_image = pil_image
         if not pil_image:
-            # Create placeholder if widget has size
-            placeholder_w = max(1, self.widget_width)
-            placeholder_h = max(1, self.widget_height)
-            img = Image.new("RGB", (placeholder_w, placeholder_h), "black")
-            draw = ImageDraw.Draw(img)
-            try: font = ImageFont.truetype("arial.ttf", 20)
-            except IOError: font = ImageFont.load_default()
-            text = "No video loaded / Seek to display frame"
-
-            text_bbox = draw.textbbox((0,0), text, font=font) if hasattr(draw, 'textbbox') else (0,0,0,0) # Basic fallback
-            if text_bbox == (0,0,0,0) and hasattr(draw, 'textlength'): # PIL < 10
-                 try:
-                     text_w = draw.textlength(text, font=font)
-                     text_h = font.getsize(text)[1] if hasattr(font, 'getsize') else 20
-                 except AttributeError:
-                     text_w, text_h = 100, 20 # Fallback size
-            elif text_bbox != (0,0,0,0):
-                 text_w = text_bbox[2] - text_bbox[0]
-                 text_h = text_bbox[3] - text_bbox[1]
-            else: # Absolute fallback
-                 text_w, text_h = 100, 20
-
-            text_x = max(0, (placeholder_w - text_w) // 2)
-            text_y = max(0, (placeholder_h - text_h) // 2)
-            draw.text((text_x, text_y), text, fill="white", font=font)
-
-            self.display_ctk_image = ctk.CTkImage(light_image=img, dark_image=img, size=(placeholder_w, placeholder_h))
-            self.label.configure(image=self.display_ctk_image, text="")
-            self.label.image = self.display_ctk_image # Keep reference
-            # print("DEBUG: Placeholder set")
+            self.canvas.itemconfigure(self.image_item, state="hidden")
+            for line_item in self.line_items.values():
+                self.canvas.itemconfigure(line_item, state="hidden")
+            self.canvas.coords(self.placeholder_item, max(1, self.widget_width) // 2, max(1, self.widget_height) // 2)
+            self.canvas.itemconfigure(self.placeholder_item, state="normal")
             return
 
         # If we have an image but no video properties set yet, derive from image
@@ -215,46 +168,52 @@ class VideoFrameLabelCTK:
             return
 
         self._calculate_display_geometry(pil_image.width, pil_image.height)
+        if abs(pil_image.width - self.scaled_image_width) <= 1 and abs(pil_image.height - self.scaled_image_height) <= 1:
+            # Already decoded at display size (rounding may differ by a pixel): show it as is instead of resampling
+            self.scaled_image_width, self.scaled_image_height = pil_image.width, pil_image.height
+            self.offset_x = (self.widget_width - self.scaled_image_width) // 2
+            self.offset_y = (self.widget_height - self.scaled_image_height) // 2
+
+        # The scaled frame only has to be rebuilt for a new frame or a new widget size
+        base_size = (self.scaled_image_width, self.scaled_image_height)
+        if pil_image is not self.base_source_image or base_size != self.base_size:
+            img_for_display = pil_image
+            if pil_image.size != base_size:
+                try:
+                    img_for_display = pil_image.resize(base_size, Image.Resampling.LANCZOS)
+                except AttributeError: # Older Pillow
+                    img_for_display = pil_image.resize(base_size, Image.LANCZOS)
+            self.base_photo = ImageTk.PhotoImage(img_for_display)
+            self.base_source_image = pil_image
+            self.base_size = base_size
+            self.canvas.itemconfigure(self.image_item, image=self.base_photo)
+        self.canvas.coords(self.image_item, self.offset_x, self.offset_y)
+        self.canvas.itemconfigure(self.image_item, state="normal")
+        self.canvas.itemconfigure(self.placeholder_item, state="hidden")
+        self._update_line_items()
+
+    def _update_line_items(self):
+        # Moves the four crop line items; cheap enough for every <B1-Motion> event
+        if not self.current_pil_image or self.video_width <= 0 or self.video_height <= 0 or \
+           self.scaled_image_width <= 0 or self.scaled_image_height <= 0:
+            return
+        scale_x_factor = self.scaled_image_width / self.video_width
+        scale_y_factor = self.scaled_image_height / self.video_height
 
-        img_for_display = self.current_pil_image.copy()
-        try:
-            img_for_display = img_for_display.resize((self.scaled_image_width, self.scaled_image_height), Image.Resampling.LANCZOS)
-        except AttributeError: # Older Pillow
-            img_for_display = img_for_display.resize((self.scaled_image_width, self.scaled_image_height), Image.LANCZOS)
-
-        draw = ImageDraw.Draw(img_for_display)
-
-        # Draw lines only if video dimensions are valid
-        if self.video_width > 0 and self.video_height > 0 and self.scaled_image_width > 0 and self.scaled_image_height > 0:
-            scale_x_factor = self.scaled_image_width / self.video_width
-            scale_y_factor = self.scaled_image_height / self.video_height
-
-            # print(f"DEBUG: Drawing lines. Scale factors: x={scale_x_factor:.2f}, y={scale_y_factor:.2f}")
-            # print(f"DEBUG: Vid Coords: T={self.line_top_y_vid}, B={self.line_bottom_y_vid}, L={self.line_left_x_vid}, R={self.line_right_x_vid}")
-
-            disp_top_y = int(self.line_top_y_vid * scale_y_factor)
-            disp_bottom_y = int(self.line_bottom_y_vid * scale_y_factor)
-            disp_left_x = int(self.line_left_x_vid * scale_x_factor)
-            disp_right_x = int(self.line_right_x_vid * scale_x_factor)
-
-            # Clamp display coordinates to be within the scaled image boundaries
-            disp_top_y = max(0, min(disp_top_y, self.scaled_image_height - 1))
-            disp_bottom_y = max(0, min(disp_bottom_y, self.scaled_image_height - 1))
-            disp_left_x = max(0, min(disp_left_x, self.scaled_image_width - 1))
-            disp_right_x = max(0, min(disp_right_x, self.scaled_image_width - 1))
-
-            # print(f"DEBUG: Disp Coords: T={disp_top_y}, B={disp_bottom_y}, L={disp_left_x}, R={disp_right_x}")
-
-            draw.line([(0, disp_top_y), (self.scaled_image_width -1, disp_top_y)], fill="lime", width=2)
-            draw.line([(0, disp_bottom_y), (self.scaled_image_width-1, disp_bottom_y)], fill="lime", width=2)
-            draw.line([(disp_left_x, 0), (disp_left_x, self.scaled_image_height-1)], fill="lime", width=2)
-            draw.line([(disp_right_x, 0), (disp_right_x, self.scaled_image_height-1)], fill="lime", width=2)
-
-        self.display_ctk_image = ctk.CTkImage(light_image=img_for_display, dark_image=img_for_display,
-                                              size=(self.scaled_image_width, self.scaled_image_height))
-        self.label.configure(image=self.display_ctk_image, text="")
-        self.label.image = self.display_ctk_image # Keep reference
-        # print("DEBUG: Image with lines set")
+        # Clamp display coordinates to be within the scaled image boundaries
+        disp_top_y = max(0, min(int(self.line_top_y_vid * scale_y_factor), self.scaled_image_height - 1)) + self.offset_y
+        disp_bottom_y = max(0, min(int(self.line_bottom_y_vid * scale_y_factor), self.scaled_image_height - 1)) + self.offset_y
+        disp_left_x = max(0, min(int(self.line_left_x_vid * scale_x_factor), self.scaled_image_width - 1)) + self.offset_x
+        disp_right_x = max(0, min(int(self.line_right_x_vid * scale_x_factor), self.scaled_image_width - 1)) + self.offset_x
+        image_right_x = self.offset_x + self.scaled_image_width - 1
+        image_bottom_y = self.offset_y + self.scaled_image_height - 1
+
+        self.canvas.coords(self.line_items["top"], self.offset_x, disp_top_y, image_right_x, disp_top_y)
+        self.canvas.coords(self.line_items["bottom"], self.offset_x, disp_bottom_y, image_right_x, disp_bottom_y)
+        self.canvas.coords(self.line_items["left"], disp_left_x, self.offset_y, disp_left_x, image_bottom_y)
+        self.canvas.coords(self.line_items["right"], disp_right_x, self.offset_y, disp_right_x, image_bottom_y)
+        for line_item in self.line_items.values():
+            self.canvas.itemconfigure(line_item, state="normal")
 
     def _widget_to_video_coords(self, widget_x, widget_y):
         if self.scaled_image_width == 0 or self.scaled_image_height == 0: return 0, 0
@@ -305,7 +264,7 @@ class VideoFrameLabelCTK:
         vid_x, vid_y = self._widget_to_video_coords(event.x, event.y)
         cursor_map = {"top": "sb_v_double_arrow", "bottom": "sb_v_double_arrow",
                       "left": "sb_h_double_arrow", "right": "sb_h_double_arrow"}
-        self.label.configure(cursor=cursor_map.get(self.dragging_line, "arrow"))
+        self.canvas.configure(cursor=cursor_map.get(self.dragging_line, "arrow"))
 
         # Ensure coordinates stay within video bounds and lines don't cross
         vh_m1 = self.video_height - 1 if self.video_height > 0 else 0
@@ -321,27 +280,27 @@ class VideoFrameLabelCTK:
             self.line_right_x_vid = max(self.line_left_x_vid + 1, min(vid_x, vw_m1))
 
         self._ensure_lines_valid_video_coords() # Redundant check, but safe
-        self.set_pil_image(self.current_pil_image) # Redraw with new line positions
+        self._update_line_items() # Only the line items move; the frame image stays as it is
         self._emit_lines_changed()
 
     def _mouse_hover_cursor(self, event):
         if self.dragging_line: return
         if not self.current_pil_image or self.video_width == 0 or self.video_height == 0:
-            self.label.configure(cursor="arrow"); return
+            self.canvas.configure(cursor="arrow"); return
 
         if self._is_point_in_rect(event.x, event.y, self._get_line_rect_widget_coords("top")) or \
            self._is_point_in_rect(event.x, event.y, self._get_line_rect_widget_coords("bottom")):
-            self.label.configure(cursor="sb_v_double_arrow")
+            self.canvas.configure(cursor="sb_v_double_arrow")
         elif self._is_point_in_rect(event.x, event.y, self._get_line_rect_widget_coords("left")) or \
              self._is_point_in_rect(event.x, event.y, self._get_line_rect_widget_coords("right")):
-            self.label.configure(cursor="sb_h_double_arrow")
-        else: self.label.configure(cursor="arrow")
+            self.canvas.configure(cursor="sb_h_double_arrow")
+        else: self.canvas.configure(cursor="arrow")
 
     def _mouse_release(self, event):
         if self.dragging_line and self.current_pil_image:
             self._emit_lines_changed()
         self.dragging_line = None
-        self.label.configure(cursor="arrow")
+        self.canvas.configure(cursor="arrow")
 
 
     def _ensure_lines_valid_video_coords(self):
@@ -442,7 +401,7 @@ class CropRegionEditorWindow(ctk.CTkToplevel):
     def __init__(self, master, general_cfg_path_var, video_input_folder_var, main_app_refresh_callback, initial_crop_settings):
         super().__init__(master)
         self.title("Visual Crop Region Editor")
-        self.geometry("900x750")
+        self.geometry("900x870")
         self.transient(master)
         self.grab_set()
 
@@ -452,14 +411,30 @@ class CropRegionEditorWindow(ctk.CTkToplevel):
         self.initial_crop_settings_from_main_app = initial_crop_settings
 
         self.video_path = None
-        self.cap = None
+        self.frame_source = None # vsf_preview frame source (OpenCV or ffmpeg backend)
         self.video_fps = 0
         self.video_total_frames = 0
         self.video_duration_ms = 0
         self.video_width = 0
         self.video_height = 0
+        self.frame_cache = get_frame_cache()
+        # Seeks decode on a background thread; self.frame_source is shared with it under source_lock
+        self.source_lock = threading.Lock()
+        self.seek_generation = 0 # Incremented per seek; older decodes never replace a newer frame
+        self.shown_generation = 0
+        self.current_time_ms = 0
+        self.frame_decoder = LatestRequestWorker(self._decode_frame, self._on_frame_decoded)
+        self.keyframes_ms = None # Loaded in the background per video; plain OpenCV seeks until it is ready
+        self.video_files = [] # Input folder contents shown in the thumbnail strip
+        self.thumbnail_buttons = {} # video path -> CTkButton
+        self.thumbnail_images = {} # video path -> CTkImage (kept referenced while shown)
+        self.thumbnail_loader = ThumbnailLoader(self._on_thumbnail_loaded)
+        self.analysis_stop_event = threading.Event() # Set on close; stops contact sheet sampling and band detection
 
         self.current_crop_percentages_ini_style = self.initial_crop_settings_from_main_app.copy()
+        self.general_crop_settings = self.initial_crop_settings_from_main_app.copy() # What "Save to general.cfg" writes
+        self.crop_profiles = None # crop_profiles.json of the input folder
+        self.active_profile = None # Description of the profile shown on the lines, None = general.cfg crop
 
         self._init_ui()
         self.video_frame_widget.apply_percentages_ini_style(self.current_crop_percentages_ini_style, emit_change=False)
@@ -472,6 +447,9 @@ class CropRegionEditorWindow(ctk.CTkToplevel):
         main_frame = ctk.CTkFrame(self)
         main_frame.pack(padx=10, pady=10, fill="both", expand=True)
 
+        self.thumbnail_strip = ctk.CTkScrollableFrame(main_frame, orientation="horizontal", height=THUMBNAIL_SIZE[1] + 30)
+        self.thumbnail_strip.pack(fill="x", padx=5, pady=(5,0))
+
         video_area_frame = ctk.CTkFrame(main_frame)
         video_area_frame.pack(padx=5, pady=5, fill="both", expand=True)
         self.video_frame_widget = VideoFrameLabelCTK(video_area_frame, 640, 360, self.update_percentage_labels_and_storage)
@@ -486,6 +464,14 @@ class CropRegionEditorWindow(ctk.CTkToplevel):
         self.time_slider.pack(side="left", fill="x", expand=True, padx=5)
         self.total_time_label = ctk.CTkLabel(time_layout, text="00:00.000", width=80)
         self.total_time_label.pack(side="left", padx=5)
+        self.snap_keyframes_var = ctk.BooleanVar(value=False)
+        ctk.CTkCheckBox(time_layout, text="Snap to keyframes", variable=self.snap_keyframes_var).pack(side="left", padx=5)
+        ctk.CTkLabel(time_layout, text=f"\u2190/\u2192: frame, Shift: \u00b1{FRAME_STEP_LARGE}").pack(side="left", padx=5)
+
+        self.bind("<Left>", lambda event: self._on_step_key(event, -1))
+        self.bind("<Right>", lambda event: self._on_step_key(event, 1))
+        self.bind("<Shift-Left>", lambda event: self._on_step_key(event, -FRAME_STEP_LARGE))
+        self.bind("<Shift-Right>", lambda event: self._on_step_key(event, FRAME_STEP_LARGE))
 
         perc_frame = ctk.CTkFrame(main_frame)
         perc_frame.pack(fill="x", padx=5, pady=5)
@@ -499,11 +485,35 @@ class CropRegionEditorWindow(ctk.CTkToplevel):
         self.right_perc_label = ctk.CTkLabel(perc_frame, text="Crop Right: N/A")
         self.right_perc_label.grid(row=0, column=3, padx=2,pady=2, sticky="w")
 
+        # Batch-wide checks of the crop region
+        tools_frame = ctk.CTkFrame(main_frame)
+        tools_frame.pack(fill="x", padx=5, pady=(5,0))
+        self.contact_sheet_button = ctk.CTkButton(tools_frame, text="Contact Sheet", width=120, command=self._open_contact_sheet)
+        self.contact_sheet_button.pack(side="left", padx=5, pady=5)
+        self.detect_band_button = ctk.CTkButton(tools_frame, text="Detect Band", width=110, command=self._start_band_detection)
+        self.detect_band_button.pack(side="left", padx=5, pady=5)
+        self.save_video_profile_button = ctk.CTkButton(tools_frame, text="Save for Video", width=110,
+                                                       command=lambda: self._save_crop_profile(for_resolution=False))
+        self.save_video_profile_button.pack(side="left", padx=(20,5), pady=5)
+        self.save_resolution_profile_button = ctk.CTkButton(tools_frame, text="Save for Resolution", width=130,
+                                                            command=lambda: self._save_crop_profile(for_resolution=True))
+        self.save_resolution_profile_button.pack(side="left", padx=5, pady=5)
+        self.remove_profile_button = ctk.CTkButton(tools_frame, text="Remove Profile", width=110, command=self._remove_crop_profile)
+        self.remove_profile_button.pack(side="left", padx=5, pady=5)
+        self.profile_label = ctk.CTkLabel(tools_frame, text="Crop: general.cfg", anchor="w")
+        self.profile_label.pack(side="left", padx=10, pady=5, fill="x", expand=True)
+
         controls_frame = ctk.CTkFrame(main_frame)
         controls_frame.pack(fill="x", padx=5, pady=5)
         self.open_video_button = ctk.CTkButton(controls_frame, text="Open Video", command=self._open_video_file_dialog)
         self.open_video_button.pack(side="left", padx=5, pady=5)
-        self.loaded_video_label = ctk.CTkLabel(controls_frame, text="No video loaded", anchor="w", wraplength=400)
+        ctk.CTkLabel(controls_frame, text="Preview:").pack(side="left", padx=(5,2), pady=5)
+        self.preview_backend_var = ctk.StringVar(value=PREVIEW_BACKENDS[0])
+        ctk.CTkComboBox(controls_frame, variable=self.preview_backend_var, values=PREVIEW_BACKENDS, width=90,
+                        command=self._on_preview_backend_changed).pack(side="left", padx=2, pady=5)
+        self.decode_stats_label = ctk.CTkLabel(controls_frame, text="", width=110, anchor="w")
+        self.decode_stats_label.pack(side="left", padx=2, pady=5)
+        self.loaded_video_label = ctk.CTkLabel(controls_frame, text="No video loaded", anchor="w", wraplength=300)
         self.loaded_video_label.pack(side="left", padx=10, pady=5, fill="x", expand=True)
         self.save_cfg_button = ctk.CTkButton(controls_frame, text="Save to general.cfg & Close", command=self._save_config_and_close)
         self.save_cfg_button.pack(side="right", padx=5, pady=5)
@@ -522,7 +532,9 @@ class CropRegionEditorWindow(ctk.CTkToplevel):
         resolved_folder_path = folder_p if folder_p.is_absolute() else (BASE_PATH / folder_p).resolve()
         print(f"DEBUG: Resolved video input folder: {resolved_folder_path}")
 
-        if not resolved_folder_path.is_dir():
+        if resolved_folder_path.is_dir():
+            self.crop_profiles = CropProfiles(resolved_folder_path, print)
+        else:
             print(f"DEBUG: Video input path is not a valid directory: {resolved_folder_path}")
             self.video_frame_widget.set_pil_image(None)
             self.loaded_video_label.configure(text=f"Error: Input path not a directory.")
@@ -530,17 +542,16 @@ class CropRegionEditorWindow(ctk.CTkToplevel):
 
         first_video_file = None
         try:
-            sorted_files = sorted(resolved_folder_path.glob('*.*'))
-            for item in sorted_files:
-                if item.is_file() and item.suffix.lower() in VIDEO_FILE_EXTENSIONS:
-                    first_video_file = item
-                    print(f"DEBUG: Found first video file: {first_video_file}")
-                    break
+            self.video_files = [str(item) for item in find_video_files(resolved_folder_path) if item.is_file()]
+            if self.video_files:
+                first_video_file = self.video_files[0]
+                print(f"DEBUG: Found first video file: {first_video_file}")
         except Exception as e:
             print(f"ERROR: Error scanning directory {resolved_folder_path}: {e}")
             self._show_error(f"Error scanning video input directory:\n{resolved_folder_path}\n{e}")
             self.video_frame_widget.set_pil_image(None)
             return
+        self._populate_thumbnail_strip()
 
         if first_video_file:
             print(f"DEBUG: Calling _load_video for {first_video_file}")
@@ -573,24 +584,18 @@ class CropRegionEditorWindow(ctk.CTkToplevel):
         self.video_duration_ms = info['duration_ms']
         print(f"DEBUG: Video Info: {self.video_width}x{self.video_height} @ {self.video_fps:.2f}fps, {self.video_duration_ms}ms, {self.video_total_frames} frames")
 
-        if self.cap:
-            self.cap.release()
-        try:
-            self.cap = cv2.VideoCapture(self.video_path)
-            if not self.cap.isOpened():
-                raise IOError(f"Could not open video with OpenCV: {self.video_path}")
-        except Exception as e:
-            self._show_error(f"OpenCV Error: {e}")
-            self.cap = None
+        self.keyframes_ms = None
+        if not self._open_frame_source():
             self.video_path = None
             self.video_frame_widget.set_pil_image(None)
             self.time_slider.configure(state="disabled")
-            self.loaded_video_label.configure(text="Error opening video (OpenCV)")
+            self.loaded_video_label.configure(text=f"Error opening video ({self.preview_backend_var.get()})")
             self.video_width = 0
             self.video_height = 0
             return False
 
         self.video_frame_widget.set_video_properties(self.video_width, self.video_height)
+        threading.Thread(target=self._load_keyframe_index, args=(self.video_path,), daemon=True).start()
 
         slider_max = 100
         if self.video_duration_ms > 0:
@@ -610,80 +615,126 @@ class CropRegionEditorWindow(ctk.CTkToplevel):
         self.loaded_video_label.configure(text=f"Loaded: {Path(self.video_path).name}")
 
         self._seek_to_time(0)
+        self._apply_crop_for_video()
         self.display_percentage_labels(self.video_frame_widget.get_current_percentages_ini_style())
+        self._highlight_thumbnail()
+        self._prefetch_next_video()
         print("DEBUG: Video loaded successfully.")
         return True
 
-    def _get_video_info(self, filepath):
+    def _populate_thumbnail_strip(self):
+        # Buttons show the file name at once; the thumbnails fill in as the loader's pool decodes them
+        for button in self.thumbnail_buttons.values(): button.destroy()
+        self.thumbnail_buttons = {}
+        self.thumbnail_images = {}
+        for column, video_path in enumerate(self.video_files):
+            name = Path(video_path).name
+            if len(name) > THUMBNAIL_NAME_CHARS: name = name[:THUMBNAIL_NAME_CHARS - 3] + "..."
+            button = ctk.CTkButton(self.thumbnail_strip, text=name, width=THUMBNAIL_SIZE[0] + 8, compound="top",
+                                   fg_color="transparent", border_width=0,
+                                   command=lambda p=video_path: self._select_thumbnail(p))
+            button.grid(row=0, column=column, padx=2, pady=2)
+            self.thumbnail_buttons[video_path] = button
+            self.thumbnail_loader.request(video_path)
+
+    def _on_thumbnail_loaded(self, video_path, rgb_thumbnail):
+        # Loader pool thread: no Tk calls here
+        if rgb_thumbnail is None: return
+        pil_image = Image.fromarray(rgb_thumbnail)
+        try: self.after(0, lambda: self._set_thumbnail(video_path, pil_image))
+        except Exception: pass # Window already destroyed
+
+    def _set_thumbnail(self, video_path, pil_image):
+        button = self.thumbnail_buttons.get(video_path)
+        if not button or not button.winfo_exists(): return
+        ctk_image = ctk.CTkImage(light_image=pil_image, dark_image=pil_image, size=pil_image.size)
+        self.thumbnail_images[video_path] = ctk_image
+        button.configure(image=ctk_image)
+
+    def _select_thumbnail(self, video_path):
+        if video_path != self.video_path:
+            self._load_video(video_path)
+
+    def _highlight_thumbnail(self):
+        for video_path, button in self.thumbnail_buttons.items():
+            button.configure(border_width=2 if video_path == self.video_path else 0)
+
+    def _prefetch_next_video(self):
+        # Probe and decode the first frame of the next video in the strip, so clicking it shows a frame immediately
+        if self.video_path not in self.video_files: return
+        index = self.video_files.index(self.video_path)
+        if index + 1 >= len(self.video_files): return
+        box_size = (self.video_frame_widget.widget_width, self.video_frame_widget.widget_height)
+        self.thumbnail_loader.submit(self._prefetch_video, self.video_files[index + 1], box_size, self.preview_backend_var.get())
+
+    def _prefetch_video(self, video_path, box_size, backend):
+        # Loader pool thread: fills the probe cache and the frame cache entry _seek_to_time(0) will look up
         try:
-            startupinfo = None
-            if os.name == 'nt':
-                startupinfo = subprocess.STARTUPINFO()
-                startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                startupinfo.wShowWindow = subprocess.SW_HIDE
-
-            command = [ FFPROBE_PATH, "-v", "quiet", "-print_format", "json", "-show_format", "-show_streams", filepath ]
-            result = subprocess.run(command, capture_output=True, text=True, check=True, startupinfo=startupinfo, encoding='utf-8', errors='replace')
-            data = json.loads(result.stdout)
-
-            video_stream = next((s for s in data['streams'] if s['codec_type'] == 'video'), None)
-            if not video_stream: self._show_error("No video stream found."); return None
-
-            width = int(video_stream.get('width', 0)); height = int(video_stream.get('height', 0))
-            if width <= 0 or height <= 0: self._show_error(f"Video stream has invalid dimensions: {width}x{height}."); return None
-
-            duration_str = video_stream.get('duration', data.get('format', {}).get('duration', None))
-            duration_ms = 0
-            if duration_str is not None:
-                 try:
-                     duration_ms = int(float(duration_str) * 1000)
-                 except (ValueError, TypeError):
-                     print(f"WARN: Could not parse duration '{duration_str}'")
-                     duration_ms = 0
-
-            fps_str = video_stream.get('avg_frame_rate', "0/0")
-            if fps_str in ("0/0", "0/1"): fps_str = video_stream.get('r_frame_rate', "0/0")
-
-            num, den = 0, 1
-            fps = 0.0
-            if '/' in fps_str:
-                 try:
-                     num, den = map(int, fps_str.split('/'))
-                     if den != 0: fps = num / den
-                 except ValueError:
-                     print(f"WARN: Could not parse FPS ratio '{fps_str}'")
-            elif fps_str != "0":
-                 try:
-                     fps = float(fps_str)
-                     num = fps
-                     den = 1
-                 except ValueError:
-                      print(f"WARN: Could not parse FPS float '{fps_str}'")
-
-            total_frames_str = video_stream.get('nb_frames', "0")
-            total_frames = 0
+            info = get_probe_cache().get_video_info(video_path)
+            display_size = fit_size(info['width'], info['height'], *box_size)
+            if self.frame_cache.get(video_path, 0, display_size) is not None: return
+            frame_source = open_frame_source(backend, video_path, info['fps'])
             try:
-                 parsed_frames = int(total_frames_str)
-                 if parsed_frames > 0 : total_frames = parsed_frames
-            except (ValueError, TypeError): pass
-
-            if total_frames == 0 and duration_ms > 0 and fps > 0:
-                total_frames = int((duration_ms / 1000.0) * fps)
-                print(f"DEBUG: Estimated total frames from duration/fps: {total_frames}")
-
-            if duration_ms <= 0 and total_frames > 0 and fps > 0:
-                duration_ms = int((total_frames / fps) * 1000.0)
-                print(f"DEBUG: Estimated duration from frames/fps: {duration_ms}ms")
+                rgb_frame = frame_source.read_frame_at(0, display_size)
+                if rgb_frame is not None:
+                    self.frame_cache.put(video_path, frame_bucket(0, info['fps']), Image.fromarray(rgb_frame))
+            finally:
+                frame_source.close()
+        except Exception as e:
+            print(f"WARN: Prefetch failed for {video_path}: {e}")
 
-            if duration_ms <= 0 and total_frames <= 0 :
-                 print("WARN: Could not determine reliable duration or total frame count.")
+    def _get_video_info(self, filepath):
+        # Served from the shared on-disk probe cache; ffprobe only runs for new or changed files
+        try:
+            info = get_probe_cache().get_video_info(filepath)
+        except ProbeError as e:
+            self._show_error(str(e)); return None
+        except Exception as e:
+            self._show_error(f"Error parsing video info: {e}\n{traceback.format_exc()}"); return None
 
-            return {"width": width, "height": height, "fps": fps, "total_frames": total_frames, "duration_ms": duration_ms}
+        if info['duration_ms'] <= 0 and info['total_frames'] <= 0:
+             print("WARN: Could not determine reliable duration or total frame count.")
+        return info
 
-        except FileNotFoundError: self._show_error(f"{FFPROBE_PATH} not found. Please ensure it's installed and in your PATH."); return None
-        except subprocess.CalledProcessError as e: self._show_error(f"ffprobe error: {e.stderr if e.stderr else 'Unknown error'}"); return None
-        except json.JSONDecodeError as e: self._show_error(f"Error parsing ffprobe output: {e}"); return None
-        except Exception as e: self._show_error(f"Error parsing video info: {e}\n{traceback.format_exc()}"); return None
+    def _open_frame_source(self):
+        backend = self.preview_backend_var.get()
+        try:
+            frame_source = open_frame_source(backend, self.video_path, self.video_fps)
+        except Exception as e:
+            self._show_error(f"Preview Error ({backend}): {e}")
+            frame_source = None
+        with self.source_lock:
+            if self.frame_source:
+                self._print_decode_stats(self.frame_source)
+                self.frame_source.close()
+            self.frame_source = frame_source
+            if frame_source: frame_source.keyframes_ms = self.keyframes_ms
+        self.decode_stats_label.configure(text="")
+        return frame_source is not None
+
+    def _on_preview_backend_changed(self, backend):
+        if not self.video_path: return
+        self.frame_cache.clear() # Otherwise cached frames hide the new backend's decode times
+        if self._open_frame_source():
+            self._seek_to_time(self.current_time_ms)
+
+    def _print_decode_stats(self, frame_source):
+        if frame_source.decode_count:
+            print(f"DEBUG: Preview backend {frame_source.name}: {frame_source.decode_count} frames decoded, "
+                  f"{frame_source.average_decode_ms():.1f} ms per frame")
+
+    def _load_keyframe_index(self, video_path):
+        # Background thread: the first build reads the whole file once, later opens come from cache/keyframes/
+        try:
+            keyframes_ms = get_keyframe_index(video_path)
+        except (ProbeError, OSError) as e:
+            print(f"WARN: Keyframe index unavailable for {video_path}: {e}")
+            return
+        with self.source_lock:
+            if video_path == self.video_path and keyframes_ms:
+                self.keyframes_ms = keyframes_ms
+                if self.frame_source: self.frame_source.keyframes_ms = keyframes_ms
+        print(f"DEBUG: Keyframe index ready: {len(keyframes_ms)} keyframes")
 
     def _open_video_file_dialog(self):
         initial_dir = self.video_input_folder_var.get()
@@ -726,7 +777,7 @@ class CropRegionEditorWindow(ctk.CTkToplevel):
             return 0
 
     def slider_seek_handler(self, value_str):
-        if not self.cap or not self.cap.isOpened(): return
+        if not self.frame_source: return
 
         try:
              value = float(value_str)
@@ -734,11 +785,27 @@ class CropRegionEditorWindow(ctk.CTkToplevel):
              return
 
         time_ms = self._get_slider_time_ms(value)
+        if self.snap_keyframes_var.get() and self.keyframes_ms:
+            time_ms = preceding_keyframe_ms(self.keyframes_ms, time_ms) # Keyframes decode without any forward decoding
         self.current_time_label.configure(text=self._format_time(time_ms))
         self._seek_to_time(time_ms)
 
-    def _seek_to_time(self, time_ms):
-        if not self.cap or not self.cap.isOpened():
+    def _on_step_key(self, event, frame_count):
+        if event.widget.winfo_class() == "Entry": return # Arrow keys move the text cursor there
+        self._step_frames(frame_count)
+
+    def _step_frames(self, frame_count):
+        # Frame-accurate stepping: forward steps decode on from the current position, backward steps come from the
+        # frame cache or the frame source's ring of recently decoded frames
+        if not self.frame_source or self.video_fps <= 0: return
+        target_frame = max(0, frame_bucket(self.current_time_ms, self.video_fps) + frame_count)
+        if self.video_total_frames > 0:
+            target_frame = min(target_frame, self.video_total_frames - 1)
+        # First whole millisecond inside the target frame, so frame_bucket() maps it back to target_frame
+        self._seek_to_time(math.ceil(target_frame * 1000.0 / self.video_fps), step=True)
+
+    def _seek_to_time(self, time_ms, step=False):
+        if not self.frame_source:
              print("DEBUG: Seek attempted but video capture not ready.")
              return
 
@@ -747,21 +814,19 @@ class CropRegionEditorWindow(ctk.CTkToplevel):
         else:
              time_ms = max(0, time_ms)
 
-        target_prop = cv2.CAP_PROP_POS_MSEC
-        target_val = float(time_ms)
-
         try:
-            if not self.cap.set(target_prop, target_val):
-                 print(f"WARN: cap.set(cv2.CAP_PROP_POS_MSEC, {target_val}) returned False")
-
-            ret, frame = self.cap.read()
-
-            if ret:
-                rgb_image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                pil_image = Image.fromarray(rgb_image)
-                self.video_frame_widget.set_pil_image(pil_image)
+            # Frames are cached at display size, so scrubbing back to a position skips the seek and decode;
+            # anything else is decoded by the background worker and shown by _show_frame
+            self.seek_generation += 1
+            self.current_time_ms = time_ms
+            bucket = frame_bucket(time_ms, self.video_fps)
+            display_size = fit_size(self.video_width, self.video_height,
+                                    self.video_frame_widget.widget_width, self.video_frame_widget.widget_height)
+            pil_image = self.frame_cache.get(self.video_path, bucket, display_size)
+            if pil_image is not None:
+                self._show_frame(self.seek_generation, pil_image)
             else:
-                print(f"WARN: Frame read failed after seeking to {time_ms} ms.")
+                self.frame_decoder.request((self.seek_generation, self.video_path, time_ms, bucket, display_size, step))
 
             current_slider_val = self.time_slider.get()
             target_slider_val = 0
@@ -783,8 +848,146 @@ class CropRegionEditorWindow(ctk.CTkToplevel):
         except Exception as e:
             print(f"ERROR: Exception during seek/read: {e}\n{traceback.format_exc()}")
 
+    def _decode_frame(self, request):
+        # Runs on the decoder thread: no Tk calls here
+        generation, video_path, time_ms, bucket, display_size, step = request
+        with self.source_lock:
+            if not self.frame_source or video_path != self.video_path:
+                return None # Video was changed or closed since the request
+            rgb_frame = self.frame_source.read_frame_at(time_ms, display_size, keep_recent=step)
+            if rgb_frame is None:
+                print(f"WARN: Frame read failed after seeking to {time_ms} ms.")
+                return None
+            pil_image = Image.fromarray(rgb_frame) # Copies out of the source's reused buffer
+        self.frame_cache.put(video_path, bucket, pil_image)
+        return pil_image
+
+    def _on_frame_decoded(self, request, pil_image):
+        if pil_image is None: return
+        try: self.after(0, lambda: self._show_frame(request[0], pil_image))
+        except Exception: pass # Window already destroyed
+
+    def _show_frame(self, generation, pil_image):
+        if generation < self.shown_generation or not self.winfo_exists(): return
+        self.shown_generation = generation
+        self.video_frame_widget.set_pil_image(pil_image)
+        frame_source = self.frame_source
+        if frame_source and frame_source.decode_count:
+            self.decode_stats_label.configure(text=f"{frame_source.average_decode_ms():.1f} ms/frame")
+
+    def _open_contact_sheet(self):
+        # Samples the current crop band from every video in the strip (or just the loaded video) on a worker thread
+        video_paths = list(self.video_files) or ([self.video_path] if self.video_path else [])
+        if not video_paths:
+            self._show_error("No videos to sample. Set the Videos Input Folder or open a video first.")
+            return
+        crop_settings = self.video_frame_widget.get_current_percentages_ini_style()
+        self.contact_sheet_button.configure(state="disabled", text="Sampling...")
+        threading.Thread(target=self._build_contact_sheet, args=(video_paths, crop_settings), daemon=True).start()
+
+    def _build_contact_sheet(self, video_paths, crop_settings):
+        def report_progress(done_count, total_count):
+            try: self.after(0, lambda: self.contact_sheet_button.configure(text=f"Sampling {done_count}/{total_count}"))
+            except Exception: pass # Window already destroyed
+        try:
+            rgb_sheet, errors = build_contact_sheet(video_paths, crop_settings, stop_event=self.analysis_stop_event,
+                                                    progress_callback=report_progress)
+        except Exception as e:
+            rgb_sheet, errors = None, {"": f"{e}\n{traceback.format_exc()}"}
+        if self.analysis_stop_event.is_set(): return
+        try: self.after(0, lambda: self._show_contact_sheet(rgb_sheet, errors, len(video_paths)))
+        except Exception: pass
+
+    def _show_contact_sheet(self, rgb_sheet, errors, video_count):
+        if not self.winfo_exists(): return
+        self.contact_sheet_button.configure(state="normal", text="Contact Sheet")
+        for video_path, message in errors.items():
+            print(f"WARN: Contact sheet skipped {video_path}: {message}")
+        if rgb_sheet is None:
+            self._show_error("Could not build a contact sheet:\n" + "\n".join(errors.values()))
+            return
+        ContactSheetWindow(self, Image.fromarray(rgb_sheet), video_count - len(errors), len(errors))
+
+    def _start_band_detection(self):
+        # Proposes the tightest crop around the burned-in text of the loaded video and a few others from the strip
+        video_paths = list(self.video_files) or ([self.video_path] if self.video_path else [])
+        if not video_paths:
+            self._show_error("No videos to analyse. Set the Videos Input Folder or open a video first.")
+            return
+        if self.video_path in video_paths: # Always include the video being looked at
+            video_paths.remove(self.video_path)
+            video_paths.insert(0, self.video_path)
+        self.detect_band_button.configure(state="disabled", text="Detecting...")
+        threading.Thread(target=self._run_band_detection, args=(video_paths,), daemon=True).start()
+
+    def _run_band_detection(self, video_paths):
+        try:
+            result = detect_subtitle_band(video_paths, stop_event=self.analysis_stop_event)
+        except Exception as e:
+            result = (None, 0, 0, {"": f"{e}\n{traceback.format_exc()}"})
+        if self.analysis_stop_event.is_set(): return
+        try: self.after(0, lambda: self._offer_band_proposal(*result))
+        except Exception: pass # Window already destroyed
+
+    def _offer_band_proposal(self, proposal, text_frame_count, frame_count, errors):
+        if not self.winfo_exists(): return
+        self.detect_band_button.configure(state="normal", text="Detect Band")
+        for video_path, message in errors.items():
+            print(f"WARN: Band detection skipped {video_path}: {message}")
+        if proposal is None:
+            messagebox.showinfo("Detect Band", f"No burned-in text found in {frame_count} sampled frames.\n"
+                                "Set the crop lines by hand.", parent=self)
+            return
+        print(f"DEBUG: Proposed subtitle band: {proposal} (text in {text_frame_count}/{frame_count} frames)")
+        summary = "\n".join(f"{key}: {value:.6f}" for key, value in proposal.items())
+        if messagebox.askyesno("Detect Band", f"Text found in {text_frame_count} of {frame_count} sampled frames.\n\n"
+                               f"Proposed crop:\n{summary}\n\nApply it to the crop lines?", parent=self):
+            self.video_frame_widget.apply_percentages_ini_style(proposal)
+
+    def _apply_crop_for_video(self):
+        # Show the crop the batch will use for this video: its own profile, its resolution's, or general.cfg's
+        crop_settings, self.active_profile = None, None
+        if self.crop_profiles is not None and self.video_path in self.video_files:
+            crop_settings, self.active_profile = self.crop_profiles.lookup(Path(self.video_path).name,
+                                                                           {"width": self.video_width, "height": self.video_height})
+        self.video_frame_widget.apply_percentages_ini_style(crop_settings or self.general_crop_settings)
+        self.profile_label.configure(text=f"Crop: {self.active_profile}" if self.active_profile else "Crop: general.cfg")
+
+    def _save_crop_profile(self, for_resolution):
+        if self.crop_profiles is None or self.video_path not in self.video_files:
+            self._show_error("Crop profiles can only be saved for videos in the Videos Input Folder.")
+            return
+        video_name = Path(self.video_path).name
+        resolution = resolution_key({"width": self.video_width, "height": self.video_height})
+        if for_resolution:
+            self.crop_profiles.set_profile(self.video_frame_widget.get_current_percentages_ini_style(), resolution=resolution)
+        else:
+            self.crop_profiles.set_profile(self.video_frame_widget.get_current_percentages_ini_style(), video_name=video_name)
+        try:
+            self.crop_profiles.save()
+        except Exception as e:
+            self._show_error(f"Error writing {CROP_PROFILES_FILENAME}: {e}")
+            return
+        print(f"DEBUG: Saved crop profile for {resolution if for_resolution else video_name} to {self.crop_profiles.path}")
+        self._apply_crop_for_video()
+
+    def _remove_crop_profile(self):
+        if self.crop_profiles is None or not self.active_profile: return
+        if self.active_profile == "video profile":
+            self.crop_profiles.remove_profile(video_name=Path(self.video_path).name)
+        else:
+            self.crop_profiles.remove_profile(resolution=resolution_key({"width": self.video_width, "height": self.video_height}))
+        try:
+            self.crop_profiles.save()
+        except Exception as e:
+            self._show_error(f"Error writing {CROP_PROFILES_FILENAME}: {e}")
+            return
+        self._apply_crop_for_video()
+
     def update_percentage_labels_and_storage(self, percentages_ini_style):
         self.current_crop_percentages_ini_style = percentages_ini_style.copy()
+        if not self.active_profile: # Lines moved on a profiled video belong to its profile, not to general.cfg
+            self.general_crop_settings = percentages_ini_style.copy()
         self.display_percentage_labels(percentages_ini_style)
 
     def display_percentage_labels(self, percentages_ini_style):
@@ -811,7 +1014,10 @@ class CropRegionEditorWindow(ctk.CTkToplevel):
         general_cfg_p = Path(general_cfg_path_str)
         general_cfg_file = general_cfg_p if general_cfg_p.is_absolute() else (BASE_PATH / general_cfg_p).resolve()
 
-        current_percentages_float = self.video_frame_widget.get_current_percentages_ini_style()
+        if self.active_profile:
+            current_percentages_float = {k: float(v) for k, v in self.general_crop_settings.items()}
+        else:
+            current_percentages_float = self.video_frame_widget.get_current_percentages_ini_style()
 
         vals_to_write_str = {}
         for key, float_val in current_percentages_float.items():
@@ -883,7 +1089,14 @@ class CropRegionEditorWindow(ctk.CTkToplevel):
             self._show_error(f"Error writing configuration to {general_cfg_file.name}: {e}")
 
     def _on_close(self):
-        if self.cap: self.cap.release()
+        self.analysis_stop_event.set()
+        self.frame_decoder.close()
+        self.thumbnail_loader.close()
+        with self.source_lock:
+            if self.frame_source:
+                self._print_decode_stats(self.frame_source)
+                self.frame_source.close()
+            self.frame_source = None
         self.grab_release()
         self.destroy()
 
@@ -891,19 +1104,74 @@ class CropRegionEditorWindow(ctk.CTkToplevel):
         messagebox.showerror("Crop Editor Error", message, parent=self)
 
 
+# --- ContactSheetWindow: read-only view of the crop band sampled across the batch ---
+class ContactSheetWindow(ctk.CTkToplevel):
+    def __init__(self, master, pil_image, video_count, skipped_count):
+        super().__init__(master)
+        title = f"Contact Sheet - {video_count} video(s)"
+        if skipped_count: title += f", {skipped_count} skipped (see console)"
+        self.title(title)
+        self.geometry(f"{min(pil_image.width + 40, 1500)}x{min(pil_image.height + 40, 800)}")
+        self.transient(master)
+
+        scroll_frame = ctk.CTkScrollableFrame(self)
+        scroll_frame.pack(fill="both", expand=True, padx=5, pady=5)
+        self.sheet_image = ctk.CTkImage(light_image=pil_image, dark_image=pil_image, size=pil_image.size)
+        ctk.CTkLabel(scroll_frame, image=self.sheet_image, text="").pack(anchor="nw")
+
+
 # --- DirectoryMonitorHandler ---
 class DirectoryMonitorHandler(FileSystemEventHandler):
-    def __init__(self, output_queue):
+    # Counts the images VSF writes per video instead of logging every file; the GUI polls snapshot() on a timer
+    def __init__(self):
         super().__init__()
-        self.output_queue = output_queue
+        self.lock = threading.Lock()
+        self.video_counts = {} # video label -> {"rgb": n, "txt": n}
+        self.last_video_label = None
+        self.total_bytes = 0
+        # Newest file per images folder; it may still be being written, so it is sized once the next one appears
+        self.pending_files = {}
 
     def on_created(self, event):
-        if not event.is_directory:
-            src_path_str = str(event.src_path)
-            if os.path.basename(os.path.dirname(src_path_str)) == "RGBImages":
-                self.output_queue.put(f"Crop Text Images [RGBImages]: {os.path.basename(event.src_path)} .Done")
-            elif os.path.basename(os.path.dirname(src_path_str)) == "TXTImages":
-                self.output_queue.put(f"Cleared Text Images [TXTImages]: {os.path.basename(event.src_path)} .Done")
+        if event.is_directory: return
+        src_path_str = str(event.src_path)
+        images_dir = os.path.dirname(src_path_str)
+        images_kind = {"RGBImages": "rgb", "TXTImages": "txt"}.get(os.path.basename(images_dir))
+        if not images_kind: return
+        # <output>/<stem>_Output/[_segments/segNN/]RGBImages/<image>: count it for the video it belongs to
+        video_label = os.path.basename(os.path.dirname(images_dir))
+        for part in reversed(Path(images_dir).parts):
+            if part.endswith("_Output"):
+                video_label = part[:-len("_Output")]
+                break
+        with self.lock:
+            counts = self.video_counts.setdefault(video_label, {"rgb": 0, "txt": 0})
+            counts[images_kind] += 1
+            self.last_video_label = video_label
+            previous_file = self.pending_files.get(images_dir)
+            self.pending_files[images_dir] = src_path_str
+        if previous_file:
+            size = self._file_size(previous_file)
+            with self.lock: self.total_bytes += size
+
+    def _file_size(self, path):
+        try: return os.path.getsize(path)
+        except OSError: return 0 # Moved (segment merge) or deleted meanwhile
+
+    def snapshot(self):
+        with self.lock:
+            video_counts = {label: dict(counts) for label, counts in self.video_counts.items()}
+            pending_files = list(self.pending_files.values())
+            total_bytes = self.total_bytes
+            last_video_label = self.last_video_label
+        total_bytes += sum(self._file_size(path) for path in pending_files)
+        return {
+            "videos": video_counts,
+            "rgb": sum(c["rgb"] for c in video_counts.values()),
+            "txt": sum(c["txt"] for c in video_counts.values()),
+            "bytes": total_bytes,
+            "last_video": last_video_label,
+        }
 
 # --- VideoSubFinderGUI Class (Main Application) ---
 class VideoSubFinderGUI(ctk.CTk):
@@ -911,7 +1179,7 @@ class VideoSubFinderGUI(ctk.CTk):
         super().__init__()
 
         self.title(APP_NAME)
-        self.geometry("900x850")
+        self.geometry("900x950")
         ctk.set_appearance_mode("System")
         ctk.set_default_color_theme("blue")
 
@@ -922,16 +1190,23 @@ class VideoSubFinderGUI(ctk.CTk):
         self.processing_thread = None
         self.monitoring_thread = None # For the observer's own thread management
         self.stop_event = threading.Event()
-        self.current_vsf_process = None
+        self.batch_runner = None
         self.observer = None
+        self.monitor_handler = None
+        self.output_progress_sample = None # (time, images) of the previous refresh, for the images/s rate
+        self.output_progress_label = None
         self.crop_editor_window = None
         self.edit_crop_visual_button = None # Will hold the moved button
 
         self.log_queue = queue.Queue()
+        self.log_spill_file = None
+        self.log_spill_path = None
+        self._open_log_spill()
 
         self.main_frame = None
         self.paths_frame = None
         self.settings_frame = None
+        self.batch_frame = None
         self.controls_frame = None
         self.log_frame = None
 
@@ -939,7 +1214,8 @@ class VideoSubFinderGUI(ctk.CTk):
 
         self._init_ui()
         self.load_settings()
-        self.after(100, self.process_log_queue)
+        self.after(LOG_DRAIN_INTERVAL_MS, self.process_log_queue)
+        self.after(OUTPUT_PROGRESS_REFRESH_MS, self._refresh_output_progress)
 
         self.protocol("WM_DELETE_WINDOW", self.on_closing)
 
@@ -1059,6 +1335,52 @@ class VideoSubFinderGUI(ctk.CTk):
         self.edit_crop_visual_button.grid(row=8, column=0, columnspan=4, padx=5, pady=(10,5), sticky="ew") # Full width button
 
 
+        # --- Batch Options Frame ---
+        self.batch_frame = ctk.CTkFrame(self.main_frame)
+        self.batch_frame.pack(pady=5, padx=10, fill="x")
+        self.batch_frame.grid_columnconfigure((0,1,2,3), weight=1)
+        ctk.CTkLabel(self.batch_frame, text="Batch Options", font=ctk.CTkFont(weight="bold")).grid(row=0, column=0, columnspan=4, pady=(0,5), sticky="ew")
+
+        ctk.CTkLabel(self.batch_frame, text="Total CPU Thread Budget (num):").grid(row=1, column=0, padx=5, pady=5, sticky="w")
+        self.settings_vars["cpu_thread_budget"] = ctk.StringVar()
+        ctk.CTkEntry(self.batch_frame, textvariable=self.settings_vars["cpu_thread_budget"], width=50).grid(row=1, column=1, padx=5, pady=5, sticky="w")
+        ctk.CTkLabel(self.batch_frame, text="(blank = all cores; split across the per-video thread counts)").grid(row=1, column=2, columnspan=2, padx=5, pady=5, sticky="w")
+
+        self.settings_vars["resume_completed"] = ctk.BooleanVar()
+        ctk.CTkCheckBox(self.batch_frame, text="Skip videos already completed with the same settings", variable=self.settings_vars["resume_completed"]).grid(row=2, column=0, columnspan=4, padx=5, pady=5, sticky="w")
+
+        ctk.CTkLabel(self.batch_frame, text="Parallel ffprobe Checks (num):").grid(row=3, column=0, padx=5, pady=5, sticky="w")
+        self.settings_vars["probe_workers"] = ctk.StringVar()
+        ctk.CTkEntry(self.batch_frame, textvariable=self.settings_vars["probe_workers"], width=50).grid(row=3, column=1, padx=5, pady=5, sticky="w")
+        ctk.CTkLabel(self.batch_frame, text="Job Order:").grid(row=3, column=2, padx=5, pady=5, sticky="w")
+        self.settings_vars["job_order"] = ctk.StringVar(value="input")
+        ctk.CTkComboBox(self.batch_frame, variable=self.settings_vars["job_order"], values=JOB_ORDER_POLICIES, width=150).grid(row=3, column=3, padx=5, pady=5, sticky="w")
+
+        ctk.CTkLabel(self.batch_frame, text="Split Long Videos Into (segments):").grid(row=4, column=0, padx=5, pady=5, sticky="w")
+        self.settings_vars["segment_count"] = ctk.StringVar()
+        ctk.CTkEntry(self.batch_frame, textvariable=self.settings_vars["segment_count"], width=50).grid(row=4, column=1, padx=5, pady=5, sticky="w")
+        ctk.CTkLabel(self.batch_frame, text="Segment Overlap (sec):").grid(row=4, column=2, padx=5, pady=5, sticky="w")
+        self.settings_vars["segment_overlap_seconds"] = ctk.StringVar()
+        ctk.CTkEntry(self.batch_frame, textvariable=self.settings_vars["segment_overlap_seconds"], width=50).grid(row=4, column=3, padx=5, pady=5, sticky="w")
+        ctk.CTkLabel(self.batch_frame, text="Only Split Videos Longer Than (min):").grid(row=5, column=0, padx=5, pady=5, sticky="w")
+        self.settings_vars["segment_min_minutes"] = ctk.StringVar()
+        ctk.CTkEntry(self.batch_frame, textvariable=self.settings_vars["segment_min_minutes"], width=50).grid(row=5, column=1, padx=5, pady=5, sticky="w")
+
+        self.settings_vars["letterbox_detection"] = ctk.BooleanVar()
+        ctk.CTkCheckBox(self.batch_frame, text="Detect black bars and fit the general.cfg crop to the picture area",
+                        variable=self.settings_vars["letterbox_detection"]).grid(row=6, column=0, columnspan=4, padx=5, pady=5, sticky="w")
+
+        self.settings_vars["text_prescan"] = ctk.BooleanVar()
+        ctk.CTkCheckBox(self.batch_frame, text="Prescan for text and skip parts without it",
+                        variable=self.settings_vars["text_prescan"]).grid(row=7, column=0, columnspan=2, padx=5, pady=5, sticky="w")
+        ctk.CTkLabel(self.batch_frame, text="Prescan Sample Every (sec):").grid(row=7, column=2, padx=5, pady=5, sticky="w")
+        self.settings_vars["prescan_interval_seconds"] = ctk.StringVar()
+        ctk.CTkEntry(self.batch_frame, textvariable=self.settings_vars["prescan_interval_seconds"], width=50).grid(row=7, column=3, padx=5, pady=5, sticky="w")
+
+        self.settings_vars["skip_intro_outro"] = ctk.BooleanVar()
+        ctk.CTkCheckBox(self.batch_frame, text="Skip opening/ending sequences shared by the episodes",
+                        variable=self.settings_vars["skip_intro_outro"]).grid(row=8, column=0, columnspan=4, padx=5, pady=5, sticky="w")
+
         # --- Controls Frame ---
         self.controls_frame = ctk.CTkFrame(self.main_frame)
         self.controls_frame.pack(pady=10, padx=10, fill="x")
@@ -1073,6 +1395,8 @@ class VideoSubFinderGUI(ctk.CTk):
         self.log_frame = ctk.CTkFrame(self.main_frame)
         self.log_frame.pack(pady=5, padx=10, fill="both", expand=True)
         ctk.CTkLabel(self.log_frame, text="Output Log", font=ctk.CTkFont(weight="bold")).pack(pady=(0,5))
+        self.output_progress_label = ctk.CTkLabel(self.log_frame, text="", anchor="w")
+        self.output_progress_label.pack(fill="x", padx=5)
         self.log_text = ctk.CTkTextbox(self.log_frame, wrap="word", state="disabled", height=150)
         self.log_text.pack(fill="both", expand=True, padx=5, pady=5)
 
@@ -1186,24 +1510,77 @@ class VideoSubFinderGUI(ctk.CTk):
         except FileNotFoundError: messagebox.showerror("Open Folder", "Could not find a program to open the folder.", parent=self); self.log_queue.put(f"Error opening folder {resolved_folder_path}: File opener not found.")
         except Exception as e: messagebox.showerror("Open Folder", f"Failed to open folder: {e}", parent=self); self.log_queue.put(f"Error opening folder {resolved_folder_path}: {e}")
 
+    def _open_log_spill(self):
+        self.log_spill_path = self.abs_script_path / LOG_SPILL_FILENAME
+        try:
+            if self.log_spill_path.exists():
+                os.replace(self.log_spill_path, self.log_spill_path.with_name(LOG_SPILL_FILENAME + ".1"))
+            self.log_spill_file = open(self.log_spill_path, "w", encoding="utf-8")
+        except OSError as e:
+            print(f"WARN: Could not open log file {self.log_spill_path}: {e}")
+            self.log_spill_file = None
+
+    def _write_log_spill(self, lines):
+        if not self.log_spill_file: return
+        try:
+            self.log_spill_file.write("\n".join(lines) + "\n")
+            self.log_spill_file.flush()
+        except (OSError, ValueError) as e:
+            print(f"WARN: Writing to log file failed, file logging disabled: {e}")
+            self.log_spill_file = None
+
+    def _insert_log_lines(self, lines):
+        if not self.log_text.winfo_exists(): return
+        self.log_text.configure(state="normal")
+        self.log_text.insert("end", "\n".join(lines) + "\n")
+        line_count = int(self.log_text.index("end-1c").split('.')[0])
+        if line_count > LOG_SCROLLBACK_LINES + LOG_TRIM_SLACK:
+            self.log_text.delete("1.0", f"{line_count - LOG_SCROLLBACK_LINES}.0")
+        self.log_text.configure(state="disabled")
+        self.log_text.see("end")
+
     def log_message(self, message):
-        if self.log_text.winfo_exists():
-            self.log_text.configure(state="normal")
-            self.log_text.insert("end", str(message) + "\n")
-            self.log_text.configure(state="disabled")
-            self.log_text.see("end")
-            self.update_idletasks()
+        self._write_log_spill([str(message)])
+        self._insert_log_lines([str(message)])
 
     def process_log_queue(self):
+        # One textbox insert of at most LOG_MAX_LINES_PER_TICK lines per tick, so a burst is shown over several ticks
+        lines = []
         try:
-            while True:
-                message = self.log_queue.get_nowait()
-                self.log_message(message)
+            while len(lines) < LOG_MAX_LINES_PER_TICK:
+                lines.append(str(self.log_queue.get_nowait()))
         except queue.Empty:
             pass
         finally:
+            if lines:
+                self._write_log_spill(lines)
+                self._insert_log_lines(lines)
             if self.winfo_exists():
-                self.after(100, self.process_log_queue)
+                self.after(LOG_DRAIN_INTERVAL_MS, self.process_log_queue)
+
+    def _format_output_progress(self, snapshot, images_per_second=None):
+        text = (f"Images: {snapshot['rgb']} RGB, {snapshot['txt']} TXT ({format_size(snapshot['bytes'])}) "
+                f"from {len(snapshot['videos'])} video(s)")
+        if images_per_second is not None: text += f" | {images_per_second:.1f} images/s"
+        last_video = snapshot["last_video"]
+        if last_video:
+            counts = snapshot["videos"][last_video]
+            text += f" | latest: {last_video} ({counts['rgb']} RGB, {counts['txt']} TXT)"
+        return text
+
+    def _refresh_output_progress(self):
+        handler = self.monitor_handler
+        if handler and self.output_progress_label:
+            snapshot = handler.snapshot()
+            now = time.time()
+            images = snapshot["rgb"] + snapshot["txt"]
+            images_per_second = None
+            if self.output_progress_sample and now > self.output_progress_sample[0]:
+                images_per_second = (images - self.output_progress_sample[1]) / (now - self.output_progress_sample[0])
+            self.output_progress_sample = (now, images)
+            self.output_progress_label.configure(text=self._format_output_progress(snapshot, images_per_second))
+        if self.winfo_exists():
+            self.after(OUTPUT_PROGRESS_REFRESH_MS, self._refresh_output_progress)
 
     def _parse_general_cfg_line_for_load(self, line_content):
         line = line_content.strip()
@@ -1401,6 +1778,17 @@ class VideoSubFinderGUI(ctk.CTk):
         self.settings_vars["end_time"].set(get_setting("end_time", settings_defaults["end_time"]))
         self.settings_vars["number_threads_rgbimages"].set(get_setting("number_threads_rgbimages", settings_defaults["number_threads_rgbimages"]))
         self.settings_vars["number_threads_txtimages"].set(get_setting("number_threads_txtimages", settings_defaults["number_threads_txtimages"]))
+        self.settings_vars["cpu_thread_budget"].set(get_setting("cpu_thread_budget", settings_defaults["cpu_thread_budget"]))
+        self.settings_vars["resume_completed"].set(get_setting("resume_completed", settings_defaults["resume_completed"]).strip() == "1")
+        self.settings_vars["probe_workers"].set(get_setting("probe_workers", settings_defaults["probe_workers"]))
+        self.settings_vars["job_order"].set(get_setting("job_order", settings_defaults["job_order"]))
+        self.settings_vars["segment_count"].set(get_setting("segment_count", settings_defaults["segment_count"]))
+        self.settings_vars["segment_overlap_seconds"].set(get_setting("segment_overlap_seconds", settings_defaults["segment_overlap_seconds"]))
+        self.settings_vars["segment_min_minutes"].set(get_setting("segment_min_minutes", settings_defaults["segment_min_minutes"]))
+        self.settings_vars["letterbox_detection"].set(get_setting("letterbox_detection", settings_defaults["letterbox_detection"]).strip() == "1")
+        self.settings_vars["text_prescan"].set(get_setting("text_prescan", settings_defaults["text_prescan"]).strip() == "1")
+        self.settings_vars["prescan_interval_seconds"].set(get_setting("prescan_interval_seconds", settings_defaults["prescan_interval_seconds"]))
+        self.settings_vars["skip_intro_outro"].set(get_setting("skip_intro_outro", settings_defaults["skip_intro_outro"]).strip() == "1")
         self._load_general_cfg_settings()
 
     def _create_default_settings_file(self, path):
@@ -1425,16 +1813,11 @@ class VideoSubFinderGUI(ctk.CTk):
             if not self.config_parser.has_section("Path"): self.config_parser.add_section("Path")
             if not self.config_parser.has_section("Settings"): self.config_parser.add_section("Settings")
 
-            for key, var in self.paths_vars.items():
-                self.config_parser.set("Path", key, var.get())
-
-            self.config_parser.set("Settings", "mode_open_video", self.settings_vars["mode_open_video"].get())
-            self.config_parser.set("Settings", "create_cleared_text_images", "-ccti" if self.settings_vars["create_cleared_text_images"].get() else "")
-            self.config_parser.set("Settings", "use_cuda", "-uc" if self.settings_vars["use_cuda"].get() else "")
-            self.config_parser.set("Settings", "start_time", self.settings_vars["start_time"].get())
-            self.config_parser.set("Settings", "end_time", self.settings_vars["end_time"].get())
-            self.config_parser.set("Settings", "number_threads_rgbimages", self.settings_vars["number_threads_rgbimages"].get())
-            self.config_parser.set("Settings", "number_threads_txtimages", self.settings_vars["number_threads_txtimages"].get())
+            paths, settings = self._collect_batch_settings()
+            for key, value in paths.items():
+                self.config_parser.set("Path", key, value)
+            for key, value in settings.items():
+                self.config_parser.set("Settings", key, value)
 
             if self.config_parser.has_section("OCR"): self.config_parser.remove_section("OCR")
 
@@ -1508,221 +1891,75 @@ class VideoSubFinderGUI(ctk.CTk):
                 elif widget_class in ('CTkEntry', 'CTkComboBox', 'CTkCheckBox'):
                     widget.configure(state=state)
 
+        if self.batch_frame:
+            for widget in self.batch_frame.winfo_children():
+                if widget.winfo_class() in ('CTkEntry', 'CTkComboBox', 'CTkCheckBox'):
+                    widget.configure(state=state)
+
+    def _collect_batch_settings(self):
+        # Snapshot of the UI in Settings.ini form, read on the Tk thread before the batch starts
+        paths = {key: var.get() for key, var in self.paths_vars.items()}
+        settings = {
+            "mode_open_video": self.settings_vars["mode_open_video"].get(),
+            "create_cleared_text_images": "-ccti" if self.settings_vars["create_cleared_text_images"].get() else "",
+            "use_cuda": "-uc" if self.settings_vars["use_cuda"].get() else "",
+            "start_time": self.settings_vars["start_time"].get(),
+            "end_time": self.settings_vars["end_time"].get(),
+            "number_threads_rgbimages": self.settings_vars["number_threads_rgbimages"].get(),
+            "number_threads_txtimages": self.settings_vars["number_threads_txtimages"].get(),
+            "cpu_thread_budget": self.settings_vars["cpu_thread_budget"].get(),
+            "resume_completed": "1" if self.settings_vars["resume_completed"].get() else "0",
+            "probe_workers": self.settings_vars["probe_workers"].get(),
+            "job_order": self.settings_vars["job_order"].get(),
+            "segment_count": self.settings_vars["segment_count"].get(),
+            "segment_overlap_seconds": self.settings_vars["segment_overlap_seconds"].get(),
+            "segment_min_minutes": self.settings_vars["segment_min_minutes"].get(),
+            "letterbox_detection": "1" if self.settings_vars["letterbox_detection"].get() else "0",
+            "text_prescan": "1" if self.settings_vars["text_prescan"].get() else "0",
+            "prescan_interval_seconds": self.settings_vars["prescan_interval_seconds"].get(),
+            "skip_intro_outro": "1" if self.settings_vars["skip_intro_outro"].get() else "0",
+        }
+        return paths, settings
+
     def start_processing(self):
         self.log_message("\n" + "="*60)
         self.log_message("--- Starting Video Processing ---")
         self.log_message("="*60)
 
-        vsf_path_str = self.paths_vars["videosubfinder_path"].get()
-        vsf_exe_p = Path(vsf_path_str)
-        vsf_exe_abs = vsf_exe_p if vsf_exe_p.is_absolute() else (self.abs_script_path / vsf_exe_p).resolve()
-        if not vsf_exe_abs.is_file():
-            messagebox.showerror("Error", f"VideoSubFinder Executable not found or is not a file:\n{vsf_exe_abs}", parent=self)
-            self.log_message(f"Error: VideoSubFinder Executable path invalid: {vsf_exe_abs}")
-            return
-
-        videos_input_path_str = self.paths_vars["Videos_path"].get()
-        videos_input_p = Path(videos_input_path_str)
-        videos_input_dir = videos_input_p if videos_input_p.is_absolute() else (self.abs_script_path / videos_input_p).resolve()
-        if not videos_input_dir.is_dir():
-            messagebox.showerror("Error", f"Videos input folder does not exist or is not a directory:\n{videos_input_dir}", parent=self)
-            self.log_message(f"Error: Videos input folder invalid: {videos_input_dir}")
+        paths, settings = self._collect_batch_settings()
+        self.stop_event.clear()
+        runner = BatchRunner(paths, settings, self.log_queue.put, self.stop_event, self.abs_script_path)
+        try:
+            all_video_files = runner.prepare()
+        except BatchConfigError as e:
+            messagebox.showerror("Error", str(e), parent=self)
+            self.log_message(f"Error: {e}")
             return
 
-        general_settings_path_str = self.paths_vars["general_settings"].get()
-        resolved_gs_p = None
-        if general_settings_path_str:
-            gs_p = Path(general_settings_path_str)
-            resolved_gs_p = gs_p if gs_p.is_absolute() else (self.abs_script_path / gs_p).resolve()
-            if not resolved_gs_p.exists():
-                self.log_message(f"Warning: General settings file specified but does not exist:\n{resolved_gs_p}")
-                self.log_message("VSF will use internal defaults or settings from Settings.ini if applicable.")
-            elif not resolved_gs_p.is_file():
-                 messagebox.showerror("Error", f"The specified general settings path is not a file:\n{resolved_gs_p}", parent=self)
-                 self.log_message(f"Error: General settings path is not a file: {resolved_gs_p}")
-                 return
-
         # Check for video files BEFORE starting thread/disabling controls
-        all_video_files = []
-        if videos_input_dir.is_dir(): # Ensure directory is valid before globbing
-            for ext in VIDEO_FILE_EXTENSIONS:
-                all_video_files.extend(list(videos_input_dir.glob(f'*{ext}')))
-                all_video_files.extend(list(videos_input_dir.glob(f'*{ext.upper()}')))
-            all_video_files = sorted(list(set(all_video_files)))
-
         if not all_video_files:
-            self.log_message(f"No video files ({', '.join(VIDEO_FILE_EXTENSIONS)}) found in the input directory: {videos_input_dir}")
+            self.log_message(f"No video files ({', '.join(VIDEO_FILE_EXTENSIONS)}) found in the input directory: {runner.videos_input_dir}")
             messagebox.showinfo("No Videos Found",
-                                f"No video files ({', '.join(VIDEO_FILE_EXTENSIONS)}) found in the input directory:\n{videos_input_dir}\n\nProcessing cannot start.",
+                                f"No video files ({', '.join(VIDEO_FILE_EXTENSIONS)}) found in the input directory:\n{runner.videos_input_dir}\n\nProcessing cannot start.",
                                 parent=self)
             self.log_message("--- Video Processing Aborted (No Videos) ---")
             return # Exit before disabling controls or starting thread
-        self.log_message(f"Found {len(all_video_files)} video files to process in {videos_input_dir}.")
-
-        custom_output_path_str = self.paths_vars["output_path"].get()
-        output_rel_or_abs = custom_output_path_str if custom_output_path_str else DEFAULT_OUTPUT_RELPATH
-        output_p = Path(output_rel_or_abs)
-        self.current_run_output_dir = output_p if output_p.is_absolute() else (self.abs_script_path / output_p).resolve()
-
-        try:
-            self.current_run_output_dir.mkdir(parents=True, exist_ok=True)
+        self.log_message(f"Found {len(all_video_files)} video files to process in {runner.videos_input_dir}.")
 
-        except Exception as e:
-            messagebox.showerror("Error", f"Could not create output directory:\n{self.current_run_output_dir}\nError: {e}", parent=self)
-            self.log_message(f"Error: Could not create output directory '{self.current_run_output_dir}': {e}")
-            return
-
-        self.stop_event.clear()
+        self.batch_runner = runner
+        self.current_run_output_dir = runner.output_dir
         self._set_controls_state(processing=True)
-        # Pass the found video files to the processing target
-        self.processing_thread = threading.Thread(target=self._processing_loop_target,
-                                                  args=(str(self.current_run_output_dir), all_video_files),
-                                                  daemon=True)
+        self.processing_thread = threading.Thread(target=self._processing_loop_target, args=(runner,), daemon=True)
         self.processing_thread.start()
         self.start_monitoring(str(self.current_run_output_dir))
 
 
-    def _processing_loop_target(self, current_output_dir_str, video_files_to_process):
-        current_output_dir = Path(current_output_dir_str)
-        all_video_files = video_files_to_process # Use the passed list
-
+    def _processing_loop_target(self, runner):
         try:
-            vsf_exe_p = Path(self.paths_vars["videosubfinder_path"].get())
-            vsf_exe_path = str(vsf_exe_p if vsf_exe_p.is_absolute() else (self.abs_script_path / vsf_exe_p).resolve())
-
-            general_settings_param = ""
-            general_settings_path_str = self.paths_vars["general_settings"].get()
-            if general_settings_path_str:
-                gs_p = Path(general_settings_path_str)
-                resolved_gs_p = gs_p if gs_p.is_absolute() else (self.abs_script_path / gs_p).resolve()
-                if resolved_gs_p.is_file():
-                    general_settings_param = str(resolved_gs_p)
-                else:
-                    self.log_queue.put(f"Note: general_settings file '{resolved_gs_p.name if resolved_gs_p else general_settings_path_str}' not found or not a file. VSF will not use the -gs parameter.")
-
-            use_cuda_val = "-uc" if self.settings_vars["use_cuda"].get() else ""
-            num_threads_rgb_val = self.settings_vars["number_threads_rgbimages"].get().strip()
-            num_threads_txt_val = self.settings_vars["number_threads_txtimages"].get().strip()
-            create_cleared_val = "-ccti" if self.settings_vars["create_cleared_text_images"].get() else ""
-            start_time_val = self.settings_vars["start_time"].get().strip()
-            end_time_val = self.settings_vars["end_time"].get().strip()
-            mode_open_video_val = self.settings_vars["mode_open_video"].get()
-
-            if not all_video_files:
-                self.log_queue.put(f"DEBUG: _processing_loop_target received an empty video list. This shouldn't happen if start_processing is correct.")
-                return
-
-            total_files = len(all_video_files)
-            for idx, video_file_path_obj in enumerate(all_video_files): # video_file is now a Path object
-                if self.stop_event.is_set():
-                    self.log_queue.put("Processing stopped by user.")
-                    break
-
-                stem = video_file_path_obj.stem
-                output_file_prefix = current_output_dir / f"{stem}_Output"
-                self.log_queue.put(f"\n--- Processing file {idx+1}/{total_files}: {video_file_path_obj.name} ---")
-
-                command = [vsf_exe_path]
-                if mode_open_video_val: command.append(mode_open_video_val)
-                command.extend(["-i", str(video_file_path_obj)]) # Use the Path object directly
-                command.extend(["-o", str(output_file_prefix)])
-                command.extend(["-r", "-c"]) # -r: Run, -c: Create RGBImages
-
-                if use_cuda_val: command.append(use_cuda_val)
-                if num_threads_rgb_val: command.extend(["-nthr", num_threads_rgb_val])
-                if num_threads_txt_val: command.extend(["-nocrthr", num_threads_txt_val])
-                if create_cleared_val: command.append(create_cleared_val)
-                if start_time_val: command.extend(["-s", start_time_val])
-                if end_time_val: command.extend(["-e", end_time_val])
-                if general_settings_param: command.extend(["-gs", general_settings_param])
-
-                command = [str(c).strip() for c in command if str(c).strip()]
-
-
-                start_process_time = perf_time()
-                self.current_vsf_process = None
-
-                try:
-                    creationflags = subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
-                    self.current_vsf_process = subprocess.Popen(
-                        command,
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.PIPE,
-                        text=True,
-                        bufsize=1,
-                        universal_newlines=True,
-                        encoding='utf-8',
-                        errors='replace',
-                        creationflags=creationflags
-                    )
-
-                    stdout_lines = []
-                    stderr_lines = []
-
-                    def read_pipe(pipe, output_list, pipe_name):
-                        try:
-                             if pipe:
-                                 for line in iter(pipe.readline, ''):
-                                     if self.stop_event.is_set(): break
-                                     line_strip = line.strip()
-                                     if line_strip:
-                                         output_list.append(line_strip)
-
-                        except Exception as e:
-                             self.log_queue.put(f"Error reading VSF {pipe_name}: {e}")
-                        finally:
-                             if pipe: pipe.close()
-
-                    stdout_thread = threading.Thread(target=read_pipe, args=(self.current_vsf_process.stdout, stdout_lines, "stdout"), daemon=True)
-                    stderr_thread = threading.Thread(target=read_pipe, args=(self.current_vsf_process.stderr, stderr_lines, "stderr"), daemon=True)
-                    stdout_thread.start()
-                    stderr_thread.start()
-
-                    stdout_thread.join()
-                    stderr_thread.join()
-                    return_code = self.current_vsf_process.wait()
-                    self.current_vsf_process = None
-
-                    if self.stop_event.is_set():
-                        self.log_queue.put(f"Process for {stem} interrupted by user.")
-                        break
-
-                    time_used = round(perf_time() - start_process_time)
-
-                    # --- MODIFICATION START: Changed time formatting and log message ---
-                    time_str = f"{int(time_used // 3600):02}h:{int((time_used % 3600) // 60):02}m:{int(time_used % 60):02}s"
-
-                    if return_code == 0:
-                        self.log_queue.put(f"\nProcess completed: {stem} -> Time Finished: {time_str}")
-                    else:
-
-                        if stderr_lines: self.log_queue.put("")
-                        # Log time even on error, might be useful
-                        self.log_queue.put(f"\nProcess completed: {stem} -> Time Finished: {time_str}")
-
-                    self.log_queue.put("|" + "="*75 + "|")
-                    # --- MODIFICATION END ---
-
-
-                except FileNotFoundError:
-                    self.log_queue.put(f"FATAL Error: VideoSubFinder executable not found at '{vsf_exe_path}'. Processing stopped.")
-                    if self.winfo_exists(): # Ensure messagebox is parented correctly if GUI still exists
-                        self.after(0, lambda: messagebox.showerror("Execution Error", f"VideoSubFinder executable not found:\n{vsf_exe_path}", parent=self))
-                    break
-                except Exception as e:
-                    self.log_queue.put(f"An error occurred while running VSF for {video_file_path_obj.name}: {e}\n{traceback.format_exc()}")
-                    if self.current_vsf_process:
-                         self.current_vsf_process.kill()
-                         self.current_vsf_process = None
-                    # if self.winfo_exists():
-                    #    self.after(0, lambda: messagebox.showerror("Runtime Error", f"Error processing {video_file_path_obj.name}:\n{e}", parent=self))
-                    break # Stop on unexpected errors for a single file
-                finally:
-                    if self.stop_event.is_set() and self.current_vsf_process:
-                         self.log_queue.put(f"Ensuring VSF process for {stem} is terminated due to stop signal.")
-                         try: self.current_vsf_process.kill()
-                         except: pass # Ignore errors if already dead
-                         self.current_vsf_process = None
+            runner.run()
+            if runner.scheduler and runner.scheduler.executable_not_found and not self.stop_event.is_set():
+                if self.winfo_exists(): # Ensure messagebox is parented correctly if GUI still exists
+                    self.after(0, lambda: messagebox.showerror("Execution Error", f"VideoSubFinder executable not found:\n{runner.vsf_exe_path}", parent=self))
         except Exception as e:
             self.log_queue.put(f"Critical error in processing loop setup: {e}\n{traceback.format_exc()}")
         finally:
@@ -1746,24 +1983,8 @@ class VideoSubFinderGUI(ctk.CTk):
         self.log_message("--- Stopping Video Processing ---")
         self.stop_event.set()
 
-        if self.current_vsf_process and self.current_vsf_process.poll() is None:
-            pid = self.current_vsf_process.pid
-            self.log_message(f"Attempting to terminate VideoSubFinder process (PID: {pid})...")
-            try:
-                self.current_vsf_process.terminate()
-                try:
-                    self.current_vsf_process.wait(timeout=1.0)
-                    self.log_message(f"VSF process {pid} terminated gracefully.")
-                except subprocess.TimeoutExpired:
-                    self.log_message(f"VSF process {pid} did not terminate gracefully, forcing kill...")
-                    self.current_vsf_process.kill()
-                    self.log_message(f"VSF process {pid} kill signal sent.")
-                except Exception as e_wait:
-                     self.log_message(f"Error during VSF process wait: {e_wait}. Attempting kill.")
-                     self.current_vsf_process.kill()
-            except Exception as e:
-                self.log_message(f"Error terminating VideoSubFinder process {pid}: {e}")
-            self.current_vsf_process = None
+        if self.batch_runner:
+            self.batch_runner.stop()
         self.stop_monitoring()
         self._set_controls_state(processing=False)
         self.log_message("--- Stop request processed ---")
@@ -1780,7 +2001,9 @@ class VideoSubFinderGUI(ctk.CTk):
 
         self.stop_monitoring() # Ensure previous observer is stopped
 
-        event_handler = DirectoryMonitorHandler(self.log_queue)
+        event_handler = DirectoryMonitorHandler()
+        self.monitor_handler = event_handler
+        self.output_progress_sample = None
         try:
             self.observer = Observer()
             self.observer.schedule(event_handler, str(monitor_path), recursive=True)
@@ -1808,6 +2031,14 @@ class VideoSubFinderGUI(ctk.CTk):
                  self.log_queue.put(f"Error stopping monitoring: {e}")
             finally:
                  self.observer = None
+        if self.monitor_handler:
+            # One summary line per video instead of the per-image lines; the progress label keeps the totals
+            snapshot = self.monitor_handler.snapshot()
+            for video_label, counts in snapshot["videos"].items():
+                self.log_queue.put(f"[{video_label}] Images created: {counts['rgb']} RGBImages, {counts['txt']} TXTImages")
+            if snapshot["videos"]:
+                self.log_queue.put(self._format_output_progress(snapshot))
+            self.monitor_handler = None
 
 
     def on_closing(self):
@@ -1836,6 +2067,13 @@ class VideoSubFinderGUI(ctk.CTk):
             self.stop_monitoring()
             self.destroy()
 
+    def destroy(self):
+        if self.log_spill_file:
+            try: self.log_spill_file.close()
+            except OSError as e: print(f"WARN: Error closing log file: {e}")
+            self.log_spill_file = None
+        super().destroy()
+
 # --- Main Execution Block ---
 if __name__ == "__main__":
     try:
@@ -1844,11 +2082,11 @@ if __name__ == "__main__":
             startupinfo = subprocess.STARTUPINFO()
             startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
             startupinfo.wShowWindow = subprocess.SW_HIDE
-        ffprobe_cmd = [FFPROBE_PATH, "-version"]
+        ffprobe_cmd = [get_ffprobe_command(), "-version"]
         result = subprocess.run(ffprobe_cmd, capture_output=True, check=True, startupinfo=startupinfo, text=True, encoding='utf-8', errors='replace')
         print(f"ffprobe found: {result.stdout.splitlines()[0]}")
     except FileNotFoundError:
-        messagebox.showerror("Dependency Error", f"'{FFPROBE_PATH}' command not found. Please ensure FFmpeg (which includes ffprobe) is installed and its location is added to your system's PATH environment variable.")
+        messagebox.showerror("Dependency Error", tool_not_found_message("ffprobe", FFPROBE_PATH))
         sys.exit(1)
     except subprocess.CalledProcessError as e:
         messagebox.showerror("Dependency Error", f"'{FFPROBE_PATH}' failed to run. Please ensure FFmpeg is installed correctly.\nCommand: {' '.join(ffprobe_cmd)}\nError: {e}\nOutput:\n{e.stderr}")
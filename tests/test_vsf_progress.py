@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+# Run with: python -m pytest tests  (or: python -m unittest discover tests)
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from vsf_batch import parse_vsf_progress_line
+
+
+class ParseVSFProgressLineTests(unittest.TestCase):
+    def test_status_line(self):
+        self.assertAlmostEqual(parse_vsf_progress_line("%12.34 eta : 00:01:00 run_time : 00:00:05"), 0.1234)
+        self.assertAlmostEqual(parse_vsf_progress_line("  % 100 eta : N/A run_time : 00:10:00\r"), 1.0)
+        self.assertEqual(parse_vsf_progress_line("%0.00 eta : N/A run_time : 00:00:00"), 0.0)
+
+    def test_percent_above_100_is_ignored(self):
+        self.assertIsNone(parse_vsf_progress_line("%250 eta : 00:00:01 run_time : 00:00:01"))
+
+    def test_other_lines_are_ignored(self):
+        for line in (
+            "Duration: 00:23:40.05, start: 0.000000, bitrate: 1524 kb/s",
+            "CPU usage 100%",
+            "Started at 12:34:56",
+            "12.34%",
+            "frame 1200",
+            "Search subtitles in video 00:01:30.000 - 00:20:00.000",
+            "eta : 00:01:00",
+            "",
+        ):
+            with self.subTest(line=line):
+                self.assertIsNone(parse_vsf_progress_line(line))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,406 @@
+# -*- coding: utf-8 -*-
+# Whole-video frame sampling and analysis: contact sheet and subtitle band detection for the crop editor, black
+# bar detection, the text prescan and intro/outro fingerprints for the batch runner.
+# Like vsf_batch.py and vsf_preview.py, nothing in this module may import customtkinter/tkinter.
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from vsf_batch import CACHE_DIR, file_fingerprint, get_probe_cache, merge_text_samples
+
+# --- Crop band geometry ---
+def crop_band_rect(crop_settings, width, height):
+    # Pixel rectangle (x0, y0, x1, y1) VSF scans for the general.cfg-style percentages. The *_end values are
+    # measured from the bottom for top/bottom and from the left for left/right, as in the crop editor.
+    top_y = int((1.0 - float(crop_settings.get('top_video_image_percent_end', 1.0))) * height)
+    bottom_y = int((1.0 - float(crop_settings.get('bottom_video_image_percent_end', 0.0))) * height)
+    left_x = int(float(crop_settings.get('left_video_image_percent_end', 0.0)) * width)
+    right_x = int(float(crop_settings.get('right_video_image_percent_end', 1.0)) * width)
+    y0, y1 = sorted((max(0, min(top_y, height)), max(0, min(bottom_y, height))))
+    x0, x1 = sorted((max(0, min(left_x, width)), max(0, min(right_x, width))))
+    return x0, y0, max(x1, x0 + 1), max(y1, y0 + 1)
+
+
+# --- Frame sampling ---
+# Samples are read in time order from one capture: short gaps are crossed with grab(), which skips the colour
+# conversion and keeps the decoder sequential; only gaps longer than SAMPLE_MAX_GRAB_FRAMES seek instead, since
+# grabbing through minutes of video costs more than one keyframe seek.
+SAMPLE_MAX_GRAB_FRAMES = 250
+
+def evenly_spaced_times(duration_ms, sample_count, start_ms=0):
+    # Centres of sample_count equal slices, so neither the first nor the last frame (often black) is picked
+    if duration_ms <= 0 or sample_count <= 0: return []
+    span_ms = duration_ms - start_ms
+    return [int(start_ms + span_ms * (index + 0.5) / sample_count) for index in range(sample_count)]
+
+def sample_frames(video_path, times_ms, fps, stop_event=None):
+    # Yields (time_ms, bgr_frame) for each requested time; the frame array is reused between samples
+    cap = cv2.VideoCapture(str(video_path))
+    if not cap.isOpened():
+        raise IOError(f"Could not open video with OpenCV: {video_path}")
+    frame_buffer = None
+    next_frame = 0 # Index of the frame the next grab() returns
+    try:
+        for time_ms in sorted(times_ms):
+            if stop_event is not None and stop_event.is_set(): return
+            target_frame = int(time_ms * fps / 1000.0) if fps > 0 else next_frame
+            if target_frame < next_frame or target_frame - next_frame > SAMPLE_MAX_GRAB_FRAMES:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, float(target_frame))
+                next_frame = target_frame
+            while next_frame < target_frame:
+                if not cap.grab(): return
+                next_frame += 1
+            if not cap.grab(): return
+            next_frame += 1
+            ret, frame = cap.retrieve(frame_buffer)
+            if not ret: continue
+            frame_buffer = frame
+            yield time_ms, frame
+    finally:
+        cap.release()
+
+
+# --- Contact sheet: the crop band of a few frames from every video, tiled into one image ---
+CONTACT_SHEET_SAMPLES = 6
+CONTACT_SHEET_TILE_WIDTH = 240
+CONTACT_SHEET_LABEL_HEIGHT = 18
+CONTACT_SHEET_GAP = 2
+CONTACT_SHEET_WORKERS = 4
+
+def contact_sheet_row(video_path, crop_settings, sample_count=CONTACT_SHEET_SAMPLES, tile_width=CONTACT_SHEET_TILE_WIDTH,
+                      stop_event=None):
+    # Crop band tiles (BGR) of one video, each scaled to tile_width
+    info = get_probe_cache().get_video_info(video_path)
+    x0, y0, x1, y1 = crop_band_rect(crop_settings, info['width'], info['height'])
+    tile_height = max(1, int(round((y1 - y0) * tile_width / (x1 - x0))))
+    tiles = []
+    for _, frame in sample_frames(video_path, evenly_spaced_times(info['duration_ms'], sample_count), info['fps'], stop_event):
+        band = frame[min(y0, frame.shape[0] - 1):y1, min(x0, frame.shape[1] - 1):x1]
+        tiles.append(cv2.resize(band, (tile_width, tile_height), interpolation=cv2.INTER_AREA))
+    return tiles
+
+def build_contact_sheet(video_paths, crop_settings, sample_count=CONTACT_SHEET_SAMPLES, tile_width=CONTACT_SHEET_TILE_WIDTH,
+                        max_workers=CONTACT_SHEET_WORKERS, stop_event=None, progress_callback=None):
+    # Returns (rgb_sheet or None, {video_path: error message}). Videos are decoded in a thread pool; rows keep
+    # the order of video_paths. progress_callback(done_count, total_count) is called from the calling thread.
+    rows = {}
+    errors = {}
+    with ThreadPoolExecutor(max_workers=max(1, int(max_workers))) as executor:
+        futures = {executor.submit(contact_sheet_row, video_path, crop_settings, sample_count, tile_width, stop_event): video_path
+                   for video_path in video_paths}
+        try:
+            for done_count, future in enumerate(as_completed(futures), 1):
+                video_path = futures[future]
+                try:
+                    rows[video_path] = future.result()
+                    if not rows[video_path]: errors[video_path] = "No frames could be decoded"
+                except Exception as e:
+                    errors[video_path] = str(e)
+                if progress_callback: progress_callback(done_count, len(futures))
+                if stop_event is not None and stop_event.is_set(): break
+        finally:
+            for future in futures: future.cancel()
+
+    ordered_rows = [(video_path, rows[video_path]) for video_path in video_paths if rows.get(video_path)]
+    if not ordered_rows:
+        return None, errors
+    sheet_width = sample_count * (tile_width + CONTACT_SHEET_GAP) + CONTACT_SHEET_GAP
+    sheet_height = sum(CONTACT_SHEET_LABEL_HEIGHT + tiles[0].shape[0] + CONTACT_SHEET_GAP for _, tiles in ordered_rows)
+    sheet = np.full((sheet_height, sheet_width, 3), 32, dtype=np.uint8)
+    y = 0
+    for video_path, tiles in ordered_rows:
+        # cv2.putText only draws ASCII; other characters show as '?'
+        label = Path(video_path).name.encode("ascii", "replace").decode("ascii")
+        cv2.putText(sheet, label, (CONTACT_SHEET_GAP + 2, y + CONTACT_SHEET_LABEL_HEIGHT - 5), cv2.FONT_HERSHEY_SIMPLEX,
+                    0.45, (220, 220, 220), 1, cv2.LINE_AA)
+        y += CONTACT_SHEET_LABEL_HEIGHT
+        for index, tile in enumerate(tiles):
+            x = CONTACT_SHEET_GAP + index * (tile_width + CONTACT_SHEET_GAP)
+            sheet[y:y + tile.shape[0], x:x + tile_width] = tile
+        y += tiles[0].shape[0] + CONTACT_SHEET_GAP
+    return cv2.cvtColor(sheet, cv2.COLOR_BGR2RGB), errors
+
+
+# --- Subtitle band detection ---
+# Every sample is reduced to a fixed-size grey image, so videos of any resolution add into the same profiles and
+# results come out directly as fractions of the frame. Burned-in text shows up as many strong horizontal luma
+# steps next to bright pixels (the glyph against its outline); a row counts as text-like in a frame when enough of
+# its width has such steps. Static logos are too narrow to pass that test, and scene detail rarely lines up on the
+# same rows from frame to frame the way subtitles do.
+ANALYSIS_SIZE = (640, 360)
+TEXT_EDGE_MIN_STEP = 60 # Luma difference between neighbouring pixels
+TEXT_EDGE_MIN_BRIGHT = 170 # The brighter side of the step
+TEXT_ROW_MIN_DENSITY = 0.06 # Fraction of a row's width that must be text-like edges
+BAND_ROW_MIN_SHARE = 0.3 # Rows kept relative to the busiest row's hit count
+BAND_ROW_MAX_GAP = 0.02 # Gaps between text rows up to this fraction of the height are bridged (line spacing)
+BAND_COLUMN_MIN_SHARE = 0.05
+BAND_PADDING = 0.02 # Added around the detected text on every side
+BAND_MIN_TEXT_FRAMES = 3
+SUBTITLE_BAND_SAMPLES = 40 # Per video
+SUBTITLE_BAND_MAX_VIDEOS = 8 # Videos picked evenly from the batch
+
+def analysis_gray(bgr_frame):
+    return cv2.cvtColor(cv2.resize(bgr_frame, ANALYSIS_SIZE, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+
+def text_edge_mask(gray):
+    # (H, W-1) boolean map of strong horizontal steps with a bright side
+    left = gray[:, :-1].astype(np.int16)
+    right = gray[:, 1:].astype(np.int16)
+    return (np.abs(right - left) >= TEXT_EDGE_MIN_STEP) & (np.maximum(left, right) >= TEXT_EDGE_MIN_BRIGHT)
+
+def _runs(flags):
+    # (start, end) index pairs of consecutive True values
+    padded = np.concatenate(([False], flags, [False]))
+    changes = np.flatnonzero(padded[1:] != padded[:-1])
+    return list(zip(changes[::2], changes[1::2]))
+
+class SubtitleBandDetector:
+    def __init__(self):
+        width, height = ANALYSIS_SIZE
+        self.row_hits = np.zeros(height, dtype=np.int32) # Frames in which each row looked like text
+        self.edge_sum = np.zeros((height, width - 1), dtype=np.int32) # Text-like edges per pixel, over all frames
+        self.frame_count = 0
+        self.text_frame_count = 0
+
+    def add_frame(self, bgr_frame):
+        mask = text_edge_mask(analysis_gray(bgr_frame))
+        text_rows = mask.mean(axis=1) >= TEXT_ROW_MIN_DENSITY
+        self.frame_count += 1
+        if not text_rows.any(): return
+        self.text_frame_count += 1
+        self.row_hits += text_rows
+        self.edge_sum[text_rows] += mask[text_rows]
+
+    def propose(self):
+        # general.cfg-style crop percentages of the smallest padded band around the text, or None
+        if self.text_frame_count < BAND_MIN_TEXT_FRAMES: return None
+        width, height = ANALYSIS_SIZE
+        text_rows = self.row_hits >= max(1, BAND_ROW_MIN_SHARE * self.row_hits.max())
+        # Bridge line spacing, then keep the block of rows with the most hits (subtitles, not a stray sign)
+        max_gap = int(BAND_ROW_MAX_GAP * height)
+        for start, end in _runs(~text_rows):
+            if start > 0 and end < height and end - start <= max_gap: text_rows[start:end] = True
+        y0, y1 = max(_runs(text_rows), key=lambda run: self.row_hits[run[0]:run[1]].sum())
+
+        column_profile = self.edge_sum[y0:y1].sum(axis=0)
+        text_columns = np.flatnonzero(column_profile >= max(1, BAND_COLUMN_MIN_SHARE * column_profile.max()))
+        x0, x1 = text_columns[0], text_columns[-1] + 2 # +1 for the end, +1 for the step between two pixels
+
+        pad_y, pad_x = BAND_PADDING * height, BAND_PADDING * width
+        top = max(0.0, float(y0 - pad_y) / height)
+        bottom = min(1.0, float(y1 + pad_y) / height)
+        left = max(0.0, float(x0 - pad_x) / width)
+        right = min(1.0, float(x1 + pad_x) / width)
+        return {
+            'top_video_image_percent_end': round(1.0 - top, 7),
+            'bottom_video_image_percent_end': round(1.0 - bottom, 7),
+            'left_video_image_percent_end': round(left, 7),
+            'right_video_image_percent_end': round(right, 7),
+        }
+
+def pick_evenly(items, max_count):
+    if len(items) <= max_count: return list(items)
+    return [items[int(index * len(items) / max_count)] for index in range(max_count)]
+
+def _detect_video_band(video_path, sample_count, stop_event):
+    info = get_probe_cache().get_video_info(video_path)
+    detector = SubtitleBandDetector()
+    for _, frame in sample_frames(video_path, evenly_spaced_times(info['duration_ms'], sample_count), info['fps'], stop_event):
+        detector.add_frame(frame)
+    return detector
+
+def detect_subtitle_band(video_paths, sample_count=SUBTITLE_BAND_SAMPLES, max_videos=SUBTITLE_BAND_MAX_VIDEOS,
+                         max_workers=CONTACT_SHEET_WORKERS, stop_event=None):
+    # Returns (crop proposal or None, text frame count, sampled frame count, {video_path: error message})
+    combined = SubtitleBandDetector()
+    errors = {}
+    with ThreadPoolExecutor(max_workers=max(1, int(max_workers))) as executor:
+        futures = {executor.submit(_detect_video_band, video_path, sample_count, stop_event): video_path
+                   for video_path in pick_evenly(video_paths, max_videos)}
+        for future in as_completed(futures):
+            try:
+                detector = future.result()
+            except Exception as e:
+                errors[futures[future]] = str(e)
+                continue
+            combined.row_hits += detector.row_hits
+            combined.edge_sum += detector.edge_sum
+            combined.frame_count += detector.frame_count
+            combined.text_frame_count += detector.text_frame_count
+    return combined.propose(), combined.text_frame_count, combined.frame_count, errors
+
+
+# --- Letterbox/pillarbox detection ---
+# A row is picture when enough of its pixels are brighter than black; columns are tested only over the picture
+# rows of the same frame, so letterbox bars don't hide a pillarbox. Rows and columns are combined over all samples,
+# so a dark scene never shrinks the area, while subtitles in a bar are too sparse to count as picture.
+LETTERBOX_SAMPLES = 8
+LETTERBOX_BLACK_LUMA = 24
+LETTERBOX_ACTIVE_SHARE = 0.3
+LETTERBOX_MIN_BAR = 0.01 # Bars thinner than this fraction of the frame are treated as no bar
+
+def detect_active_area(video_path, video_info, sample_count=LETTERBOX_SAMPLES, stop_event=None):
+    # [x0, y0, x1, y1] of the picture as fractions of the frame, or None when every sample was black
+    width, height = ANALYSIS_SIZE
+    picture_rows = np.zeros(height, dtype=bool)
+    picture_columns = np.zeros(width, dtype=bool)
+    times_ms = evenly_spaced_times(video_info['duration_ms'], sample_count)
+    for _, frame in sample_frames(video_path, times_ms, video_info['fps'], stop_event):
+        bright = analysis_gray(frame) > LETTERBOX_BLACK_LUMA
+        frame_rows = bright.mean(axis=1) >= LETTERBOX_ACTIVE_SHARE
+        if not frame_rows.any(): continue
+        picture_rows |= frame_rows
+        picture_columns |= bright[frame_rows].mean(axis=0) >= LETTERBOX_ACTIVE_SHARE
+    if (stop_event is not None and stop_event.is_set()) or not picture_rows.any() or not picture_columns.any():
+        return None
+    rows = np.flatnonzero(picture_rows)
+    columns = np.flatnonzero(picture_columns)
+    x0, x1 = columns[0] / width, (columns[-1] + 1) / width
+    y0, y1 = rows[0] / height, (rows[-1] + 1) / height
+    if x0 < LETTERBOX_MIN_BAR: x0 = 0.0
+    if y0 < LETTERBOX_MIN_BAR: y0 = 0.0
+    if 1.0 - x1 < LETTERBOX_MIN_BAR: x1 = 1.0
+    if 1.0 - y1 < LETTERBOX_MIN_BAR: y1 = 1.0
+    return [round(float(value), 4) for value in (x0, y0, x1, y1)]
+
+
+# --- Text prescan ---
+# Only the crop band is analysed, scaled to at most PRESCAN_BAND_WIDTH; a sample shows text when a few rows of the
+# band pass the same edge density test the subtitle band detection uses.
+PRESCAN_BAND_WIDTH = 640
+PRESCAN_MIN_TEXT_ROWS = 3
+
+def band_has_text(band_bgr):
+    height, width = band_bgr.shape[:2]
+    if width > PRESCAN_BAND_WIDTH:
+        band_bgr = cv2.resize(band_bgr, (PRESCAN_BAND_WIDTH, max(1, round(height * PRESCAN_BAND_WIDTH / width))),
+                              interpolation=cv2.INTER_AREA)
+    mask = text_edge_mask(cv2.cvtColor(band_bgr, cv2.COLOR_BGR2GRAY))
+    return int((mask.mean(axis=1) >= TEXT_ROW_MIN_DENSITY).sum()) >= PRESCAN_MIN_TEXT_ROWS
+
+def prescan_text_ranges(video_path, video_info, crop_settings, range_start_ms, range_end_ms, interval_ms, stop_event=None):
+    # [start_ms, end_ms] ranges with text in the crop band ([] = none found), or None if stopped
+    x0, y0, x1, y1 = crop_band_rect(crop_settings, video_info['width'], video_info['height'])
+    times_ms = range(int(range_start_ms + interval_ms // 2), int(range_end_ms), int(interval_ms))
+    text_times_ms = [time_ms for time_ms, frame in sample_frames(video_path, times_ms, video_info['fps'], stop_event)
+                     if band_has_text(frame[y0:y1, x0:x1])]
+    if stop_event is not None and stop_event.is_set():
+        return None
+    return merge_text_samples(text_times_ms, interval_ms, range_start_ms, range_end_ms)
+
+
+# --- Intro/outro fingerprints ---
+# Each episode's first and last INTRO_OUTRO_SEARCH_MS are sampled once per FINGERPRINT_INTERVAL_MS and reduced to
+# 64-bit difference hashes. An opening or ending shared by two episodes shows up as a long diagonal of matching
+# hashes between their sample lists. Flat frames (black, fades) hash to None and never match, otherwise every
+# pair of episodes would "share" their black frames.
+FINGERPRINT_INTERVAL_MS = 1000
+INTRO_OUTRO_SEARCH_MS = 6 * 60 * 1000
+HASH_MIN_CONTRAST = 8 # Grey level standard deviation below which a frame counts as flat
+HASH_MATCH_MAX_BITS = 10 # Hamming distance up to which two hashes show the same picture
+SHARED_RUN_MAX_GAP = 2 # Mismatching samples bridged inside a shared sequence (re-encodes, scene cuts between samples)
+MIN_SHARED_SEQUENCE_MS = 20000
+COMPARED_EPISODES = 2 # Each episode is compared with this many nearest episodes in file name order
+
+def frame_dhash(bgr_frame):
+    gray = cv2.cvtColor(cv2.resize(bgr_frame, (64, 36), interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+    if gray.std() < HASH_MIN_CONTRAST:
+        return None
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA).astype(np.int16)
+    return int.from_bytes(np.packbits(small[:, 1:] > small[:, :-1]).tobytes(), "big")
+
+def fingerprint_episode(video_path, video_info, search_ms=INTRO_OUTRO_SEARCH_MS, interval_ms=FINGERPRINT_INTERVAL_MS,
+                        stop_event=None):
+    # {"intro": [[time_ms, hash], ...], "outro": [...]}, or None if stopped
+    duration_ms = video_info['duration_ms']
+    intro_end_ms = min(search_ms, duration_ms // 2)
+    outro_start_ms = max(duration_ms - search_ms, duration_ms // 2)
+    times_ms = list(range(interval_ms // 2, intro_end_ms, interval_ms)) + \
+               list(range(outro_start_ms + interval_ms // 2, duration_ms, interval_ms))
+    fingerprints = {"intro": [], "outro": []}
+    for time_ms, frame in sample_frames(video_path, times_ms, video_info['fps'], stop_event):
+        fingerprints["intro" if time_ms < intro_end_ms else "outro"].append([time_ms, frame_dhash(frame)])
+    if stop_event is not None and stop_event.is_set():
+        return None
+    return fingerprints
+
+# Stored one file per video in cache/fingerprints/, like the keyframe index: a few hundred hashes per episode
+# would bloat probe_cache.json, which is rewritten in full on every flush and capped by entry count.
+FINGERPRINT_CACHE_DIR = CACHE_DIR / "fingerprints"
+
+def fingerprint_cache_file(video_path):
+    key = os.path.normcase(os.path.abspath(str(video_path)))
+    return FINGERPRINT_CACHE_DIR / (hashlib.sha1(key.encode("utf-8")).hexdigest() + ".json")
+
+def get_episode_fingerprint(video_path, video_info, stop_event=None):
+    # Cached fingerprint_episode(), rebuilt when the file's size or mtime or the sampling parameters changed
+    cache_file = fingerprint_cache_file(video_path)
+    fingerprint = file_fingerprint(video_path)
+    params = [FINGERPRINT_INTERVAL_MS, INTRO_OUTRO_SEARCH_MS]
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if cached.get("fingerprint") == fingerprint and cached.get("params") == params:
+            return cached["hashes"]
+    except Exception:
+        pass # Missing or unreadable cache file is rebuilt
+
+    hashes = fingerprint_episode(video_path, video_info, stop_event=stop_event)
+    if hashes is None:
+        return None
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_file.with_suffix(".json.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"path": str(video_path), "fingerprint": fingerprint, "params": params, "hashes": hashes}, f)
+        os.replace(tmp_path, cache_file)
+    except Exception as e:
+        print(f"WARN: Could not write fingerprint cache {cache_file}: {e}")
+    return hashes
+
+def _hash_array(samples):
+    hashes = np.array([h if h is not None else 0 for _, h in samples], dtype=np.uint64)
+    valid = np.array([h is not None for _, h in samples], dtype=bool)
+    return hashes, valid
+
+def longest_shared_run(samples_a, samples_b, interval_ms=FINGERPRINT_INTERVAL_MS):
+    # [start_ms, end_ms] in episode A of the longest sequence also found in episode B, or None
+    if not samples_a or not samples_b: return None
+    hashes_a, valid_a = _hash_array(samples_a)
+    hashes_b, valid_b = _hash_array(samples_b)
+    xor = hashes_a[:, None] ^ hashes_b[None, :]
+    distances = np.unpackbits(xor.view(np.uint8).reshape(xor.shape + (8,)), axis=-1).sum(axis=-1)
+    matches = (distances <= HASH_MATCH_MAX_BITS) & valid_a[:, None] & valid_b[None, :]
+
+    best = None # (length, first index in A, end index in A)
+    for offset in range(-(len(samples_a) - 1), len(samples_b)):
+        diagonal = np.diagonal(matches, offset).copy() # A[d + max(0, -offset)] against B[d + max(0, offset)]
+        if not diagonal.any(): continue
+        for start, end in _runs(~diagonal):
+            if start > 0 and end < len(diagonal) and end - start <= SHARED_RUN_MAX_GAP: diagonal[start:end] = True
+        for start, end in _runs(diagonal):
+            if best is None or end - start > best[0]:
+                best = (end - start, start + max(0, -offset), end + max(0, -offset))
+    if best is None: return None
+    _, first, end = best
+    return [max(0, samples_a[first][0] - interval_ms // 2), samples_a[end - 1][0] + interval_ms // 2]
+
+def find_shared_sequences(fingerprints, interval_ms=FINGERPRINT_INTERVAL_MS, compared_episodes=COMPARED_EPISODES):
+    # {video_path: {"intro": [start_ms, end_ms] or None, "outro": ...}} for every fingerprinted episode. fingerprints
+    # must be in episode order: each episode is compared with its nearest neighbours, the following one first.
+    video_paths = list(fingerprints)
+    shared = {}
+    for index, video_path in enumerate(video_paths):
+        neighbours = sorted((i for i in range(len(video_paths)) if i != index), key=lambda i: (abs(i - index), i < index))
+        others = [video_paths[i] for i in neighbours[:compared_episodes]]
+        shared[video_path] = {}
+        for part in ("intro", "outro"):
+            runs = [longest_shared_run(fingerprints[video_path][part], fingerprints[other][part], interval_ms) for other in others]
+            runs = [run for run in runs if run and run[1] - run[0] >= MIN_SHARED_SEQUENCE_MS]
+            shared[video_path][part] = max(runs, key=lambda run: run[1] - run[0]) if runs else None
+    return shared
@@ -0,0 +1,1717 @@
+# -*- coding: utf-8 -*-
+# Batch pipeline shared by the GUI (Batch_VideoSubFinder.py) and the headless command line:
+#     python vsf_batch.py [--settings Settings.ini] [--input FOLDER] [--output FOLDER] ...
+# Nothing in this module may import customtkinter/tkinter, so it runs on headless workers and under cron.
+import argparse
+import configparser
+import gzip
+import hashlib
+import json
+import subprocess
+import os
+import re
+import signal
+import sys
+from pathlib import Path
+from time import time as perf_time
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import queue
+import shutil
+import traceback
+
+# --- Constants ---
+SETTINGS_FILE = "Settings.ini"
+DEFAULT_OUTPUT_RELPATH = "Output_Videos_Images"
+APP_NAME = "Batch_VideoSubFinder V2.0.3"
+VERSION_INFO = "Programmed by Youtube@MrGamesKingPro"
+VIDEO_FILE_EXTENSIONS = {".mp4", ".mkv", ".avi", ".mov", ".flv", ".wmv"} # Common video extensions
+
+# --- FFprobe Path ---
+FFPROBE_PATH = "ffmpeg/ffprobe.exe" # Ensure ffprobe is in system PATH or provide full path
+FFMPEG_PATH = "ffmpeg/ffmpeg.exe"
+
+# --- Default Settings (if Settings.ini is missing) ---
+DEFAULT_SETTINGS = {
+    "Path": {
+        "videosubfinder_path": "VideoSubFinderWXW.exe",
+        "Videos_path": "Paste_Multi_Videos_Here",
+        "general_settings": "general.cfg", # Default name for general.cfg
+        "output_path": DEFAULT_OUTPUT_RELPATH,
+    },
+    "Settings": {
+        "mode_open_video": "-ovffmpeg",
+        "create_cleared_text_images": "-ccti",
+        "start_time": "",
+        "end_time": "",
+        "use_cuda": "",
+        "number_threads_rgbimages": "",
+        "number_threads_txtimages": "",
+        "cpu_thread_budget": "",
+        "resume_completed": "1", # Skip videos the output folder's manifest records as done with the same settings
+        "probe_workers": "8", # Parallel ffprobe calls in the probing stage (I/O bound, so more than the core count is fine)
+        "job_order": "input", # One of JOB_ORDER_POLICIES
+        "segment_count": "1", # Split long videos into this many overlapping time segments (1 = off)
+        "segment_overlap_seconds": "10",
+        "segment_min_minutes": "30", # Only videos (or -s/-e ranges) at least this long are split
+        "letterbox_detection": "0", # Fit the general.cfg crop to the picture area of videos with black bars
+        "text_prescan": "0", # Sample the crop band first and run VSF only on the time ranges that show text
+        "prescan_interval_seconds": "1",
+        "skip_intro_outro": "0", # Leave out opening/ending sequences shared by the episodes of the batch
+    }
+}
+
+# Default values for general.cfg crop settings (VSF standard)
+DEFAULT_CROP_SETTINGS = {
+    "top_video_image_percent_end": "0.258929",
+    "bottom_video_image_percent_end": "0",
+    "left_video_image_percent_end": "0",
+    "right_video_image_percent_end": "1",
+}
+# Order for adding to a new/empty general.cfg
+CROP_SETTING_KEYS_ORDER = [
+    "top_video_image_percent_end",
+    "bottom_video_image_percent_end",
+    "left_video_image_percent_end",
+    "right_video_image_percent_end",
+]
+
+# --- Helper: Get base path for resources (for PyInstaller) ---
+def get_base_path():
+    if getattr(sys, 'frozen', False): # PyInstaller
+        return Path(sys.executable).parent
+    return Path(__file__).parent # Script execution
+
+BASE_PATH = get_base_path()
+
+# --- CLI exit codes ---
+EXIT_OK = 0
+EXIT_JOBS_FAILED = 1 # At least one video failed or VSF could not be run
+EXIT_CONFIG_ERROR = 2 # Invalid paths/settings or no videos to process
+EXIT_INTERRUPTED = 130 # Stopped by Ctrl+C / SIGTERM
+
+class BatchConfigError(Exception):
+    pass
+
+def resolve_path(path_str, base_path=BASE_PATH):
+    p = Path(path_str)
+    return p if p.is_absolute() else (Path(base_path) / p).resolve()
+
+# --- Settings.ini: same sections/keys the GUI reads and writes ---
+def load_settings_ini(settings_ini_path, log_callback=print):
+    paths = dict(DEFAULT_SETTINGS["Path"])
+    settings = dict(DEFAULT_SETTINGS["Settings"])
+
+    settings_ini_path = Path(settings_ini_path)
+    if not settings_ini_path.exists():
+        log_callback(f"Warning: '{settings_ini_path}' not found. Using default settings.")
+        return paths, settings
+
+    config_parser = configparser.ConfigParser(allow_no_value=True)
+    try:
+        config_parser.read(str(settings_ini_path), encoding='utf-8')
+    except configparser.Error as e:
+        log_callback(f"Error reading {settings_ini_path.name}: {e}. Using default settings.")
+        return paths, settings
+
+    for key, fallback in paths.items():
+        paths[key] = config_parser.get("Path", key, fallback=fallback)
+    for key, fallback in settings.items():
+        settings[key] = config_parser.get("Settings", key, fallback=fallback)
+    return paths, settings
+
+def find_video_files(videos_input_dir):
+    all_video_files = []
+    if videos_input_dir.is_dir(): # Ensure directory is valid before globbing
+        for ext in VIDEO_FILE_EXTENSIONS:
+            all_video_files.extend(list(videos_input_dir.glob(f'*{ext}')))
+            all_video_files.extend(list(videos_input_dir.glob(f'*{ext.upper()}')))
+    return sorted(list(set(all_video_files)))
+
+def build_vsf_command(vsf_exe_path, video_path, output_prefix, settings, general_settings_param="", start_time=None, end_time=None):
+    command = [vsf_exe_path]
+    mode_open_video_val = settings.get("mode_open_video", "")
+    if mode_open_video_val: command.append(mode_open_video_val)
+    command.extend(["-i", str(video_path)])
+    command.extend(["-o", str(output_prefix)])
+    command.extend(["-r", "-c"]) # -r: Run, -c: Create RGBImages
+
+    num_threads_rgb_val = settings.get("number_threads_rgbimages", "").strip()
+    num_threads_txt_val = settings.get("number_threads_txtimages", "").strip()
+    start_time_val = start_time if start_time is not None else settings.get("start_time", "").strip()
+    end_time_val = end_time if end_time is not None else settings.get("end_time", "").strip()
+
+    if settings.get("use_cuda", "").strip() == "-uc": command.append("-uc")
+    if num_threads_rgb_val: command.extend(["-nthr", num_threads_rgb_val])
+    if num_threads_txt_val: command.extend(["-nocrthr", num_threads_txt_val])
+    if settings.get("create_cleared_text_images", "").strip() == "-ccti": command.append("-ccti")
+    if start_time_val: command.extend(["-s", start_time_val])
+    if end_time_val: command.extend(["-e", end_time_val])
+    if general_settings_param: command.extend(["-gs", str(general_settings_param)])
+
+    return [str(c).strip() for c in command if str(c).strip()]
+
+# --- ffprobe: video metadata with a persistent on-disk cache ---
+CACHE_DIR = BASE_PATH / "cache"
+PROBE_CACHE_FILENAME = "probe_cache.json"
+PROBE_CACHE_MAX_ENTRIES = 5000 # Least recently used entries are dropped beyond this
+
+class ProbeError(Exception):
+    pass
+
+class FFprobeNotFoundError(ProbeError):
+    pass
+
+def file_fingerprint(file_path):
+    stat_result = os.stat(file_path)
+    return {"size": stat_result.st_size, "mtime_ns": stat_result.st_mtime_ns}
+
+def get_ffprobe_command():
+    # Prefer the bundled ffmpeg/ffprobe.exe next to the script, then whatever is on PATH (e.g. Linux workers)
+    bundled = BASE_PATH / FFPROBE_PATH
+    if bundled.is_file():
+        return str(bundled)
+    return shutil.which("ffprobe") or FFPROBE_PATH
+
+def get_ffmpeg_command():
+    # Same lookup as ffprobe; only the crop editor's ffmpeg preview backend needs it
+    bundled = BASE_PATH / FFMPEG_PATH
+    if bundled.is_file():
+        return str(bundled)
+    return shutil.which("ffmpeg")
+
+def tool_not_found_message(tool_name, bundled_relpath):
+    # Names both places get_ffprobe_command()/get_ffmpeg_command() look in
+    bundled_dir = BASE_PATH / Path(bundled_relpath).parent
+    return (f"{tool_name} not found. Looked in {bundled_dir} and on the system PATH. "
+            f"Install FFmpeg, or copy {tool_name} into {bundled_dir}.")
+
+def hidden_startupinfo():
+    startupinfo = None
+    if os.name == 'nt':
+        startupinfo = subprocess.STARTUPINFO()
+        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+        startupinfo.wShowWindow = subprocess.SW_HIDE
+    return startupinfo
+
+def format_duration_ms(ms):
+    s = max(0, int(ms)) // 1000
+    return f"{s // 3600:d}:{(s % 3600) // 60:02d}:{s % 60:02d}"
+
+def format_size(num_bytes):
+    size = float(max(0, num_bytes))
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+def parse_ffprobe_output(data):
+    # Compact stream list kept in the cache; enough to tell what a file contains without re-probing
+    streams = []
+    for stream in data.get('streams', []):
+        streams.append({
+            "index": stream.get('index'),
+            "codec_type": stream.get('codec_type'),
+            "codec_name": stream.get('codec_name'),
+            "width": stream.get('width'),
+            "height": stream.get('height'),
+            "avg_frame_rate": stream.get('avg_frame_rate'),
+            "duration": stream.get('duration'),
+            "language": stream.get('tags', {}).get('language'),
+        })
+
+    video_stream = next((s for s in data.get('streams', []) if s.get('codec_type') == 'video'), None)
+    if not video_stream:
+        return {"streams": streams, "error": "No video stream found."}
+
+    width = int(video_stream.get('width', 0) or 0); height = int(video_stream.get('height', 0) or 0)
+    if width <= 0 or height <= 0:
+        return {"streams": streams, "error": f"Video stream has invalid dimensions: {width}x{height}."}
+
+    duration_str = video_stream.get('duration', data.get('format', {}).get('duration', None))
+    duration_ms = 0
+    if duration_str is not None:
+         try:
+             duration_ms = int(float(duration_str) * 1000)
+         except (ValueError, TypeError):
+             duration_ms = 0
+
+    fps_str = video_stream.get('avg_frame_rate', "0/0")
+    if fps_str in ("0/0", "0/1"): fps_str = video_stream.get('r_frame_rate', "0/0")
+
+    fps = 0.0
+    if '/' in fps_str:
+         try:
+             num, den = map(int, fps_str.split('/'))
+             if den != 0: fps = num / den
+         except ValueError:
+             pass
+    elif fps_str != "0":
+         try:
+             fps = float(fps_str)
+         except ValueError:
+             pass
+
+    total_frames = 0
+    try:
+         parsed_frames = int(video_stream.get('nb_frames', "0"))
+         if parsed_frames > 0 : total_frames = parsed_frames
+    except (ValueError, TypeError): pass
+
+    if total_frames == 0 and duration_ms > 0 and fps > 0:
+        total_frames = int((duration_ms / 1000.0) * fps) # Estimated from duration/fps
+
+    if duration_ms <= 0 and total_frames > 0 and fps > 0:
+        duration_ms = int((total_frames / fps) * 1000.0) # Estimated from frames/fps
+
+    return {"width": width, "height": height, "fps": fps, "total_frames": total_frames,
+            "duration_ms": duration_ms, "streams": streams}
+
+def probe_video_info(filepath):
+    ffprobe_command = get_ffprobe_command()
+    try:
+        command = [ ffprobe_command, "-v", "quiet", "-print_format", "json", "-show_format", "-show_streams", str(filepath) ]
+        result = subprocess.run(command, capture_output=True, text=True, check=True, startupinfo=hidden_startupinfo(), encoding='utf-8', errors='replace')
+        data = json.loads(result.stdout)
+    except FileNotFoundError: raise FFprobeNotFoundError(tool_not_found_message("ffprobe", FFPROBE_PATH))
+    except subprocess.CalledProcessError as e: raise ProbeError(f"ffprobe error: {e.stderr if e.stderr else 'Unknown error'}")
+    except json.JSONDecodeError as e: raise ProbeError(f"Error parsing ffprobe output: {e}")
+    return parse_ffprobe_output(data)
+
+class ProbeCache:
+    def __init__(self, cache_file=None, max_entries=PROBE_CACHE_MAX_ENTRIES):
+        self.cache_file = Path(cache_file) if cache_file else CACHE_DIR / PROBE_CACHE_FILENAME
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries = {} # normalized path -> {"size", "mtime_ns", "last_used", "info"}
+        self.dirty = False
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f).get("entries", {})
+        except Exception:
+            self.entries = {} # Missing or unreadable cache just starts empty
+
+    @staticmethod
+    def cache_key(filepath):
+        return os.path.normcase(os.path.abspath(str(filepath)))
+
+    def lookup(self, filepath):
+        key = self.cache_key(filepath)
+        try:
+            fingerprint = file_fingerprint(filepath)
+        except OSError:
+            return None
+        with self.lock:
+            entry = self.entries.get(key)
+            # A changed size or mtime means the file was replaced: the entry is stale
+            if not entry or entry.get("size") != fingerprint["size"] or entry.get("mtime_ns") != fingerprint["mtime_ns"]:
+                return None
+            entry["last_used"] = time.time()
+            self.dirty = True
+            return entry["info"]
+
+    def store(self, filepath, info):
+        try:
+            fingerprint = file_fingerprint(filepath)
+        except OSError:
+            return
+        with self.lock:
+            self.entries[self.cache_key(filepath)] = {"size": fingerprint["size"], "mtime_ns": fingerprint["mtime_ns"],
+                                                      "last_used": time.time(), "info": info}
+            if len(self.entries) > self.max_entries:
+                oldest_first = sorted(self.entries, key=lambda k: self.entries[k].get("last_used", 0))
+                for stale_key in oldest_first[:len(self.entries) - self.max_entries]:
+                    del self.entries[stale_key]
+            self.dirty = True
+
+    def get_video_info(self, filepath, save=True):
+        info = self.lookup(filepath)
+        if info is None:
+            info = probe_video_info(filepath)
+            self.store(filepath, info)
+            if save: self.flush()
+        if info.get("error"):
+            raise ProbeError(info["error"])
+        return info
+
+    def flush(self):
+        with self.lock:
+            if not self.dirty: return
+            payload = {"version": 1, "entries": dict(self.entries)}
+            self.dirty = False
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_file.with_suffix(".json.tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(payload, f)
+            os.replace(tmp_path, self.cache_file)
+        except Exception as e:
+            print(f"WARN: Could not write probe cache {self.cache_file}: {e}")
+
+_probe_cache = None
+_probe_cache_lock = threading.Lock()
+
+def get_probe_cache():
+    # One shared instance per process, used by both the crop editor and the batch runner
+    global _probe_cache
+    with _probe_cache_lock:
+        if _probe_cache is None:
+            _probe_cache = ProbeCache()
+        return _probe_cache
+
+def probe_videos(video_files, probe_cache, max_workers=8, stop_event=None):
+    # Probes every file in a bounded thread pool. Returns {path: (info, error_message)} where exactly one is None.
+    # Raises FFprobeNotFoundError if ffprobe itself is missing.
+    results = {}
+    if not video_files:
+        return results
+    with ThreadPoolExecutor(max_workers=max(1, int(max_workers))) as executor:
+        futures = {executor.submit(probe_cache.get_video_info, video_path, False): video_path for video_path in video_files}
+        try:
+            for future in as_completed(futures):
+                video_path = futures[future]
+                if stop_event is not None and stop_event.is_set():
+                    break
+                try:
+                    results[video_path] = (future.result(), None)
+                except FFprobeNotFoundError:
+                    raise
+                except ProbeError as e:
+                    results[video_path] = (None, str(e))
+                except Exception as e:
+                    results[video_path] = (None, f"Error reading video info: {e}")
+        finally:
+            for future in futures: future.cancel()
+            probe_cache.flush()
+    return results
+
+
+# --- Time ranges and segment outputs ---
+SEGMENTS_DIRNAME = "_segments" # <stem>_Output/_segments/segNN holds each segment's VSF output until it is merged
+VSF_IMAGE_TIME_PATTERN = re.compile(r'^(\d+)_(\d{2})_(\d{2})_(\d{3})__') # VSF image names start with H_MM_SS_mmm__
+
+def parse_time_to_ms(time_str):
+    # Accepts H:MM:SS.mmm (as typed in the GUI), H:MM:SS:mmm (VSF's own format), MM:SS or plain seconds
+    time_str = (time_str or "").strip()
+    if not time_str: return None
+    parts = time_str.replace(',', '.').split(':')
+    try:
+        if len(parts) == 4:
+            h, m, sec, ms = parts
+            return ((int(h) * 60 + int(m)) * 60 + int(sec)) * 1000 + int(ms.ljust(3, '0')[:3])
+        seconds = 0.0
+        for part in parts:
+            seconds = seconds * 60 + float(part)
+        return int(round(seconds * 1000))
+    except ValueError:
+        return None
+
+def format_vsf_time(ms):
+    # VSF's -s/-e format: hour:min:sec:milisec
+    s, msecs = divmod(max(0, int(ms)), 1000)
+    mins, secs = divmod(s, 60)
+    hrs, mins = divmod(mins, 60)
+    return f"{hrs:d}:{mins:02d}:{secs:02d}:{msecs:03d}"
+
+def plan_time_segments(range_start_ms, range_end_ms, segment_count, overlap_ms):
+    # Each segment owns [cut_i, cut_i+1) and VSF runs it over that range widened by the overlap on both sides,
+    # so a subtitle crossing a cut is seen whole by the segment its start time belongs to.
+    segment_count = max(1, int(segment_count))
+    length = range_end_ms - range_start_ms
+    cuts = [range_start_ms + (length * i) // segment_count for i in range(segment_count + 1)]
+    segments = []
+    for i in range(segment_count):
+        segments.append({
+            "run_start_ms": max(range_start_ms, cuts[i] - overlap_ms),
+            "run_end_ms": min(range_end_ms, cuts[i + 1] + overlap_ms),
+            "own_start_ms": cuts[i] if i > 0 else None, # None = open-ended
+            "own_end_ms": cuts[i + 1] if i < segment_count - 1 else None,
+        })
+    return segments
+
+# Text prescan: positive samples are widened by half the sample interval plus PRESCAN_PADDING_MS, and ranges
+# closer than PRESCAN_MERGE_GAP_MS are joined, since every extra range costs a VSF start-up
+PRESCAN_PADDING_MS = 2000
+PRESCAN_MERGE_GAP_MS = 20000
+PRESCAN_MAX_RANGES = 16
+
+def merge_text_samples(sample_times_ms, interval_ms, range_start_ms, range_end_ms, padding_ms=PRESCAN_PADDING_MS,
+                       merge_gap_ms=PRESCAN_MERGE_GAP_MS, max_ranges=PRESCAN_MAX_RANGES):
+    # [start_ms, end_ms] ranges covering the samples that showed text, in time order
+    ranges = []
+    for time_ms in sorted(sample_times_ms):
+        start_ms = max(range_start_ms, time_ms - interval_ms // 2 - padding_ms)
+        end_ms = min(range_end_ms, time_ms + interval_ms // 2 + padding_ms)
+        if ranges and start_ms - ranges[-1][1] <= merge_gap_ms:
+            ranges[-1][1] = max(ranges[-1][1], end_ms)
+        else:
+            ranges.append([start_ms, end_ms])
+    while len(ranges) > max(1, max_ranges): # Join across the smallest gaps until few enough VSF runs remain
+        i = min(range(len(ranges) - 1), key=lambda k: ranges[k + 1][0] - ranges[k][1])
+        ranges[i:i + 2] = [[ranges[i][0], ranges[i + 1][1]]]
+    return ranges
+
+def subtract_time_ranges(time_ranges, excluded_ranges):
+    # Parts of time_ranges not covered by any excluded range, in time order
+    remaining = [list(r) for r in sorted(time_ranges)]
+    for excluded_start, excluded_end in sorted(excluded_ranges):
+        pieces = []
+        for start_ms, end_ms in remaining:
+            if excluded_end <= start_ms or excluded_start >= end_ms:
+                pieces.append([start_ms, end_ms])
+                continue
+            if start_ms < excluded_start: pieces.append([start_ms, excluded_start])
+            if excluded_end < end_ms: pieces.append([excluded_end, end_ms])
+        remaining = pieces
+    return [tuple(r) for r in remaining]
+
+def image_start_time_ms(file_name):
+    match = VSF_IMAGE_TIME_PATTERN.match(file_name)
+    if not match:
+        return None
+    h, m, sec, ms = (int(g) for g in match.groups())
+    return ((h * 60 + m) * 60 + sec) * 1000 + ms
+
+def merge_segment_outputs(output_prefix, segment_jobs):
+    # Moves every segment's images (RGBImages, TXTImages, ...) into the normal <stem>_Output layout. An image
+    # is kept only from the segment that owns its start time, which drops the copies made in overlap windows.
+    output_prefix = Path(output_prefix)
+    merged_count, duplicate_count = 0, 0
+    # The merged images replace the video's whole output: anything left from an earlier run would otherwise
+    # be kept over the new images of the same name, and stale frames would stay in the folders
+    for old_images_dir in (p for p in output_prefix.iterdir() if p.is_dir() and p.name != SEGMENTS_DIRNAME):
+        shutil.rmtree(old_images_dir)
+    for segment_job in segment_jobs:
+        segment_dir = Path(segment_job.output_prefix)
+        if not segment_dir.is_dir():
+            continue
+        for images_dir in sorted(p for p in segment_dir.iterdir() if p.is_dir()):
+            target_dir = output_prefix / images_dir.name
+            target_dir.mkdir(parents=True, exist_ok=True)
+            for image_file in sorted(p for p in images_dir.iterdir() if p.is_file()):
+                start_ms = image_start_time_ms(image_file.name)
+                if start_ms is not None and (
+                        (segment_job.own_start_ms is not None and start_ms < segment_job.own_start_ms) or
+                        (segment_job.own_end_ms is not None and start_ms >= segment_job.own_end_ms)):
+                    duplicate_count += 1
+                    continue
+                target_file = target_dir / image_file.name
+                if target_file.exists():
+                    duplicate_count += 1
+                    continue
+                shutil.move(str(image_file), str(target_file))
+                merged_count += 1
+    shutil.rmtree(output_prefix / SEGMENTS_DIRNAME, ignore_errors=True)
+    return merged_count, duplicate_count
+
+
+# --- VSF console progress ---
+# Only VSF's own status line counts, e.g. "%12.34 eta : 00:01:00 run_time : 00:00:05" (the percentage of the
+# scanned -s/-e range). Progress only moves forward, so a percentage or timestamp picked up from any other line
+# (ffmpeg's "Duration: ...", "CPU usage 100%", wall-clock times) would pin it for the rest of the job.
+VSF_PROGRESS_LINE_PATTERN = re.compile(r'^%\s*(\d{1,3}(?:\.\d+)?)\s+eta\s*:', re.IGNORECASE)
+PROGRESS_LOG_INTERVAL_S = 30 # Minimum seconds between "Progress: ..." log lines
+TERMINATE_GRACE_S = 1.0 # How long stopped VSF processes get to exit before they are killed
+
+def parse_vsf_progress_line(line):
+    # Fraction done (0..1) reported by a VSF status line, None for every other line
+    match = VSF_PROGRESS_LINE_PATTERN.match(line.strip())
+    if not match: return None
+    percent = float(match.group(1))
+    return percent / 100 if percent <= 100 else None
+
+def estimate_remaining_s(elapsed_s, fraction):
+    if not fraction or fraction < 0.01: return None # Too early for a meaningful estimate
+    return elapsed_s * (1 - fraction) / fraction
+
+
+# --- VSF child output ---
+VSF_LOG_FILENAME = "vsf_output.log.gz" # Full console output of the VSF run, in the video's output folder
+CHILD_OUTPUT_TAIL_LINES = 50 # Lines kept in memory per running child
+CHILD_OUTPUT_FAILURE_LINES = 20 # Lines shown in the batch log when VSF fails
+
+class ChildOutputCapture:
+    # Streams a child's stdout/stderr to a gzip file as it arrives; memory use is the tail ring only
+    def __init__(self, log_path, tail_size=CHILD_OUTPUT_TAIL_LINES):
+        self.log_path = Path(log_path) if log_path else None
+        self.tail = deque(maxlen=tail_size)
+        self.line_count = 0
+        self.lock = threading.Lock() # stdout and stderr are read by separate threads
+        self.log_file = None
+        self.error = None
+        if self.log_path:
+            try:
+                self.log_path.parent.mkdir(parents=True, exist_ok=True)
+                self.log_file = gzip.open(self.log_path, "wt", encoding="utf-8")
+            except OSError as e:
+                self.error = e
+
+    def add(self, line, pipe_name):
+        entry = line if pipe_name == "stdout" else f"[{pipe_name}] {line}"
+        with self.lock:
+            self.tail.append(entry)
+            self.line_count += 1
+            if self.log_file:
+                try:
+                    self.log_file.write(entry + "\n")
+                except OSError as e:
+                    self.error = e
+                    self._close_file()
+
+    def last_lines(self, count):
+        with self.lock:
+            return list(self.tail)[-count:]
+
+    def close(self):
+        with self.lock:
+            self._close_file()
+
+    def _close_file(self):
+        log_file, self.log_file = self.log_file, None
+        if log_file:
+            try: log_file.close()
+            except OSError as e: self.error = e
+
+
+# --- general.cfg crop values (the four keys the crop editor manages) ---
+def parse_general_cfg_crop_line(line_content):
+    line = line_content.strip()
+    if not line or line.startswith('#'): return None, None
+
+    eq_pos = line.find('=')
+    col_pos = line.find(':')
+    sep_pos = -1
+    if eq_pos != -1 and (col_pos == -1 or eq_pos < col_pos): sep_pos = eq_pos
+    elif col_pos != -1: sep_pos = col_pos
+    if sep_pos == -1: return None, None
+
+    key = line[:sep_pos].strip()
+    if key not in DEFAULT_CROP_SETTINGS: return None, None
+    value_part = line[sep_pos+1:].strip()
+    comment_start = value_part.find('#')
+    value = value_part[:comment_start].strip() if comment_start != -1 else value_part
+    return key, value
+
+def read_crop_settings(general_cfg_file):
+    crop_settings = dict(DEFAULT_CROP_SETTINGS)
+    if not general_cfg_file or not Path(general_cfg_file).is_file():
+        return crop_settings
+    try:
+        with open(general_cfg_file, 'r', encoding='utf-8') as f:
+            for line_content in f:
+                key, value = parse_general_cfg_crop_line(line_content)
+                if key is None: continue
+                try:
+                    float(value)
+                    crop_settings[key] = value
+                except ValueError:
+                    pass # Keep the default, same as the GUI does for invalid values
+    except Exception:
+        pass
+    return crop_settings
+
+def format_crop_value(value):
+    # Same compact form the crop editor writes: 7 decimals, trailing zeros dropped
+    text = f"{float(value):.7f}".rstrip('0')
+    if text.endswith('.'): text = text[:-1]
+    return text or "0"
+
+def write_derived_general_cfg(base_general_cfg, crop_settings, target_file):
+    # Copy of base_general_cfg with only the four crop keys replaced (missing keys are appended)
+    values = {key: format_crop_value(crop_settings[key]) for key in CROP_SETTING_KEYS_ORDER if key in crop_settings}
+    output_lines = []
+    if base_general_cfg and Path(base_general_cfg).is_file():
+        with open(base_general_cfg, 'r', encoding='utf-8') as f:
+            for line_content in f:
+                key, _ = parse_general_cfg_crop_line(line_content)
+                if key in values:
+                    output_lines.append(f"{key} = {values.pop(key)}")
+                else:
+                    output_lines.append(line_content.rstrip('\n\r'))
+    output_lines.extend(f"{key} = {value}" for key, value in values.items())
+    target_file = Path(target_file)
+    target_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(target_file, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(output_lines) + '\n')
+    return target_file
+
+FULL_FRAME_AREA = [0.0, 0.0, 1.0, 1.0]
+
+def remap_crop_to_active_area(crop_settings, active_area):
+    # Reads the crop percentages as fractions of the picture inside the black bars and returns the matching
+    # full-frame percentages, e.g. "bottom quarter" becomes the bottom quarter of a letterboxed picture
+    x0, y0, x1, y1 = active_area
+    top_y = y0 + (1.0 - float(crop_settings['top_video_image_percent_end'])) * (y1 - y0)
+    bottom_y = y0 + (1.0 - float(crop_settings['bottom_video_image_percent_end'])) * (y1 - y0)
+    left_x = x0 + float(crop_settings['left_video_image_percent_end']) * (x1 - x0)
+    right_x = x0 + float(crop_settings['right_video_image_percent_end']) * (x1 - x0)
+    return {
+        'top_video_image_percent_end': format_crop_value(1.0 - top_y),
+        'bottom_video_image_percent_end': format_crop_value(1.0 - bottom_y),
+        'left_video_image_percent_end': format_crop_value(left_x),
+        'right_video_image_percent_end': format_crop_value(right_x),
+    }
+
+
+# --- Crop profiles: per-video and per-resolution crops stored next to the input videos ---
+CROP_PROFILES_FILENAME = "crop_profiles.json"
+DERIVED_CFG_DIRNAME = "_crop_profiles" # Derived general.cfg files in the output folder, removed after the run
+
+def resolution_key(video_info):
+    if not video_info or not video_info.get("width") or not video_info.get("height"): return None
+    return f"{video_info['width']}x{video_info['height']}"
+
+class CropProfiles:
+    # {"videos": {file name: crop}, "resolutions": {"WxH": crop}}; a video's own profile wins over its resolution's
+    def __init__(self, videos_input_dir, log_callback=print):
+        self.path = Path(videos_input_dir) / CROP_PROFILES_FILENAME
+        self.log = log_callback
+        self.videos = {}
+        self.resolutions = {}
+        self.load()
+
+    def load(self):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.videos = data.get("videos", {})
+            self.resolutions = data.get("resolutions", {})
+        except Exception as e:
+            self.log(f"Warning: Could not read {self.path.name} ({e}). Every video uses the general.cfg crop.")
+            self.videos, self.resolutions = {}, {}
+
+    def save(self):
+        tmp_path = self.path.with_suffix(".json.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": 1, "videos": self.videos, "resolutions": self.resolutions}, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def __bool__(self):
+        return bool(self.videos or self.resolutions)
+
+    def lookup(self, video_name, video_info=None):
+        # (crop settings, description) of the profile that applies, or (None, None) for the general.cfg crop
+        if video_name in self.videos:
+            return self.videos[video_name], "video profile"
+        resolution = resolution_key(video_info)
+        if resolution in self.resolutions:
+            return self.resolutions[resolution], f"{resolution} profile"
+        return None, None
+
+    def set_profile(self, crop_settings, video_name=None, resolution=None):
+        crop = {key: format_crop_value(crop_settings[key]) for key in CROP_SETTING_KEYS_ORDER}
+        if video_name: self.videos[video_name] = crop
+        if resolution: self.resolutions[resolution] = crop
+
+    def remove_profile(self, video_name=None, resolution=None):
+        if video_name: self.videos.pop(video_name, None)
+        if resolution: self.resolutions.pop(resolution, None)
+
+
+# --- BatchManifest: per-output-folder record of finished videos, used to resume interrupted batches ---
+MANIFEST_FILENAME = "batch_manifest.json"
+
+def compute_settings_hash(command, crop_settings, extra=None):
+    # Input/output paths, the executable location and the general.cfg location don't change what VSF
+    # produces, so leave them out; the crop values are hashed instead of the -gs path. extra holds batch
+    # options that change the output without being VSF arguments (left out when empty, so older hashes still match).
+    effective_args = []
+    skip_next = False
+    for arg in command[1:]:
+        if skip_next:
+            skip_next = False
+            continue
+        if arg in ("-i", "-o", "-gs"):
+            skip_next = True
+            continue
+        effective_args.append(arg)
+
+    payload = {"vsf_args": effective_args, "crop": {k: str(v) for k, v in sorted(crop_settings.items())}}
+    if extra: payload["extra"] = extra
+    payload = json.dumps(payload, sort_keys=True)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+class BatchManifest:
+    def __init__(self, output_dir, log_callback=print):
+        self.path = Path(output_dir) / MANIFEST_FILENAME
+        self.log = log_callback
+        self.lock = threading.Lock()
+        self.videos = {} # video file name -> entry dict
+        self.load()
+
+    def load(self):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.videos = json.load(f).get("videos", {})
+        except Exception as e:
+            self.log(f"Warning: Could not read {self.path.name} ({e}). All videos will be processed.")
+            self.videos = {}
+
+    def save(self):
+        tmp_path = self.path.with_suffix(".json.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": 1, "videos": self.videos}, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path) # Atomic, a crash never leaves a half-written manifest
+
+    def is_complete(self, key, fingerprint, settings_hash, output_prefix):
+        with self.lock:
+            entry = self.videos.get(key)
+        return (entry is not None
+                and entry.get("status") == "done"
+                and entry.get("fingerprint") == fingerprint
+                and entry.get("settings_hash") == settings_hash
+                and (Path(output_prefix) / "RGBImages").is_dir())
+
+    def processing_speed(self):
+        with self.lock:
+            finished = [e for e in self.videos.values()
+                        if e.get("status") == "done" and e.get("duration_ms", 0) > 0 and e.get("time_used", 0) > 0]
+        if not finished:
+            return None
+        return sum(e["time_used"] for e in finished) / (sum(e["duration_ms"] for e in finished) / 1000.0)
+
+    def mark(self, key, status, **fields):
+        with self.lock:
+            entry = self.videos.setdefault(key, {})
+            entry.update(fields)
+            entry["status"] = status
+            entry["updated"] = time.strftime("%Y-%m-%d %H:%M:%S")
+            try:
+                self.save()
+            except Exception as e:
+                self.log(f"Warning: Could not update {self.path.name}: {e}")
+
+
+# --- VSFJob: one VideoSubFinderWXW invocation ---
+class VSFJob:
+    def __init__(self, index, total, label, video_path, output_prefix, command):
+        self.index = index # 1-based position in the batch, used for "file x/y" log lines
+        self.total = total
+        self.label = label # Video stem, prefixed to every log line of this job
+        self.video_path = video_path
+        self.output_prefix = output_prefix
+        self.command = command
+        self.return_code = None
+        self.time_used = 0
+        self.status = "pending" # pending / done / failed / interrupted
+        self.fingerprint = None # Input file size/mtime, recorded in the batch manifest
+        self.video_info = None # ffprobe metadata (width/height/fps/duration_ms/...), None if probing failed
+        self.settings_hash = None
+        self.log_path = None # Where the child's console output is written (ChildOutputCapture)
+        self.general_settings_file = None # general.cfg passed with -gs (None = not used)
+        self.crop_settings = None # Crop the job runs with (general.cfg or a crop profile)
+        self.crop_profile = None # Description of the crop profile in use, None = general.cfg crop
+        self.text_ranges = None # [start_ms, end_ms] ranges found by the text prescan, None = scan the whole range
+        self.excluded_ranges = [] # Intro/outro ranges left out of the scan
+
+        # Time segments: a split video keeps its segment jobs in .segments; each segment points back via .parent
+        self.segments = []
+        self.parent = None
+        self.own_start_ms = None
+        self.own_end_ms = None
+        self.log_suffix = "" # Extra text for the "Processing file" line, e.g. the segment range
+        self.start_time = None # perf_time() of the first started segment
+        self.segments_finished = 0
+
+        # Progress parsed from VSF's console output
+        self.range_start_ms = 0 # Part of the video VSF scans; range_end_ms None = unknown
+        self.range_end_ms = None
+        self.started_at = None # perf_time() when the VSF process started
+        self.progress = None # Fraction 0..1 of the range done, None until VSF printed something usable
+
+
+# --- Job ordering ---
+JOB_ORDER_POLICIES = ["input", "longest_first", "shortest_first"]
+
+def estimate_job_cost(video_info):
+    # VSF work grows with both the number of frames and the pixels per frame; normalized to 1080p seconds
+    if not video_info:
+        return 0.0
+    pixels = max(1, video_info.get("width", 0) * video_info.get("height", 0))
+    return (video_info.get("duration_ms", 0) / 1000.0) * (pixels / (1920 * 1080))
+
+def order_jobs(jobs, policy):
+    # "longest_first" is longest-processing-time-first scheduling: with N parallel slots the long videos start
+    # early instead of becoming the last straggler. "shortest_first" gives results quickly. Videos without
+    # probe info keep their input order after the others.
+    if policy not in ("longest_first", "shortest_first"):
+        return list(jobs)
+    known = [job for job in jobs if estimate_job_cost(job.video_info) > 0]
+    unknown = [job for job in jobs if estimate_job_cost(job.video_info) <= 0]
+    known.sort(key=lambda job: estimate_job_cost(job.video_info), reverse=(policy == "longest_first"))
+    return known + unknown
+
+def compute_max_concurrent_jobs(thread_budget_str, num_threads_rgb_str, num_threads_txt_str, job_count):
+    try:
+        thread_budget = int(thread_budget_str) if thread_budget_str else (os.cpu_count() or 1)
+    except ValueError:
+        thread_budget = os.cpu_count() or 1
+
+    # VSF runs the RGBImages stage (-nthr) and the TXTImages stage (-nocrthr) one after the
+    # other, so a running job only ever occupies the larger of the two thread counts.
+    threads_per_job = 0
+    for value_str in (num_threads_rgb_str, num_threads_txt_str):
+        try:
+            if value_str: threads_per_job = max(threads_per_job, int(value_str))
+        except ValueError:
+            pass
+
+    if threads_per_job <= 0:
+        return 1 # VSF sizes its own thread pool to all cores, so run one video at a time
+    return max(1, min(thread_budget // threads_per_job, job_count))
+
+
+# --- VSFJobScheduler: keeps up to N VSF child processes running at once ---
+class VSFJobScheduler:
+    def __init__(self, max_concurrent_jobs, stop_event, log_callback, job_started_callback=None, job_finished_callback=None,
+                 job_progress_callback=None):
+        self.max_concurrent_jobs = max(1, int(max_concurrent_jobs))
+        self.stop_event = stop_event
+        self.log = log_callback
+        self.job_started_callback = job_started_callback
+        self.job_finished_callback = job_finished_callback # Called from the worker thread once the child has exited
+        self.job_progress_callback = job_progress_callback # Called from the pipe reader threads when job.progress moves
+        self.running_processes = {} # VSFJob -> subprocess.Popen
+        self.lock = threading.Lock()
+        self.fatal_error = None # Set when the batch must not start any further jobs
+        self.executable_not_found = False
+
+    def run(self, jobs):
+        pending_jobs = queue.Queue()
+        for job in jobs:
+            pending_jobs.put(job)
+
+        worker_count = min(self.max_concurrent_jobs, len(jobs))
+        workers = [threading.Thread(target=self._worker_loop, args=(pending_jobs,), daemon=True) for _ in range(worker_count)]
+        for worker in workers: worker.start()
+        for worker in workers: worker.join()
+        return jobs
+
+    def _worker_loop(self, pending_jobs):
+        while not self.stop_event.is_set() and self.fatal_error is None:
+            try:
+                job = pending_jobs.get_nowait()
+            except queue.Empty:
+                return
+            self._run_job(job)
+
+    def _run_job(self, job):
+        duration_note = f" ({format_duration_ms(job.video_info['duration_ms'])})" if job.video_info and job.video_info.get("duration_ms") else ""
+        self.log(f"\n--- Processing file {job.index}/{job.total}: {Path(job.video_path).name}{duration_note}{job.log_suffix} ---")
+        start_process_time = perf_time()
+        job.started_at = start_process_time
+        process = None
+        output_capture = None
+        job.status = "failed"
+        if self.job_started_callback: self.job_started_callback(job)
+
+        try:
+            creationflags = subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
+            process = subprocess.Popen(
+                job.command,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                bufsize=1,
+                universal_newlines=True,
+                encoding='utf-8',
+                errors='replace',
+                creationflags=creationflags
+            )
+            with self.lock:
+                self.running_processes[job] = process
+            if self.stop_event.is_set(): # Stop was requested while this job was starting
+                process.kill()
+
+            output_capture = ChildOutputCapture(job.log_path)
+            if output_capture.error:
+                self.log(f"[{job.label}] Warning: Could not create VSF log file {job.log_path}: {output_capture.error}")
+
+            def read_pipe(pipe, pipe_name):
+                try:
+                     if pipe:
+                         for line in iter(pipe.readline, ''):
+                             if self.stop_event.is_set(): break
+                             line_strip = line.strip()
+                             if line_strip:
+                                 output_capture.add(line_strip, pipe_name)
+                                 self._track_progress(job, line_strip)
+
+                except Exception as e:
+                     self.log(f"[{job.label}] Error reading VSF {pipe_name}: {e}")
+                finally:
+                     if pipe: pipe.close()
+
+            stdout_thread = threading.Thread(target=read_pipe, args=(process.stdout, "stdout"), daemon=True)
+            stderr_thread = threading.Thread(target=read_pipe, args=(process.stderr, "stderr"), daemon=True)
+            stdout_thread.start()
+            stderr_thread.start()
+
+            stdout_thread.join()
+            stderr_thread.join()
+            job.return_code = process.wait()
+            output_capture.close()
+
+            if self.stop_event.is_set():
+                job.status = "interrupted"
+                self.log(f"Process for {job.label} interrupted by user.")
+                return
+            if job.return_code == 0: job.status = "done"
+
+            job.time_used = round(perf_time() - start_process_time)
+            time_str = f"{int(job.time_used // 3600):02}h:{int((job.time_used % 3600) // 60):02}m:{int(job.time_used % 60):02}s"
+
+            if job.return_code != 0:
+                self.log(f"[{job.label}] VideoSubFinder exited with code {job.return_code}.")
+                last_lines = output_capture.last_lines(CHILD_OUTPUT_FAILURE_LINES)
+                if last_lines:
+                    self.log(f"[{job.label}] Last VSF output:\n" + "\n".join("    " + line for line in last_lines))
+                if output_capture.line_count and not output_capture.error:
+                    self.log(f"[{job.label}] Full VSF output ({output_capture.line_count} lines): {job.log_path}")
+            # Log time even on error, might be useful
+            self.log(f"\nProcess completed: {job.label} -> Time Finished: {time_str}")
+            self.log("|" + "="*75 + "|")
+
+        except FileNotFoundError:
+            self.fatal_error = f"VideoSubFinder executable not found: {job.command[0]}"
+            self.executable_not_found = True
+            self.log(f"FATAL Error: VideoSubFinder executable not found at '{job.command[0]}'. Processing stopped.")
+        except Exception as e:
+            self.fatal_error = f"Error processing {Path(job.video_path).name}: {e}"
+            self.log(f"An error occurred while running VSF for {Path(job.video_path).name}: {e}\n{traceback.format_exc()}")
+            if process and process.poll() is None:
+                 process.kill()
+        finally:
+            if self.stop_event.is_set() and process and process.poll() is None:
+                 self.log(f"Ensuring VSF process for {job.label} is terminated due to stop signal.")
+                 try: process.kill()
+                 except: pass # Ignore errors if already dead
+            if output_capture: output_capture.close()
+            with self.lock:
+                self.running_processes.pop(job, None)
+            if self.job_finished_callback:
+                try: self.job_finished_callback(job)
+                except Exception as e: self.log(f"[{job.label}] Error in job completion handler: {e}")
+
+    def _track_progress(self, job, line):
+        fraction = parse_vsf_progress_line(line)
+        if fraction is None or (job.progress is not None and fraction <= job.progress): return
+        job.progress = fraction
+        if self.job_progress_callback: self.job_progress_callback(job)
+
+    def running_jobs(self):
+        with self.lock:
+            return list(self.running_processes)
+
+    def terminate_all(self):
+        with self.lock:
+            running = [(job.label, p) for job, p in self.running_processes.items() if p.poll() is None]
+
+        for label, process in running:
+            self.log(f"Attempting to terminate VideoSubFinder process for {label} (PID: {process.pid})...")
+            try: process.terminate()
+            except Exception as e: self.log(f"Error terminating VideoSubFinder process {process.pid}: {e}")
+
+        # One shared grace period for all processes: this runs on the Tk thread when Stop is pressed, so
+        # waiting for each process in turn would freeze the window for several seconds
+        deadline = perf_time() + TERMINATE_GRACE_S
+        for label, process in running:
+            try:
+                process.wait(timeout=max(0.0, deadline - perf_time()))
+                self.log(f"VSF process {process.pid} ({label}) terminated gracefully.")
+            except subprocess.TimeoutExpired:
+                self.log(f"VSF process {process.pid} ({label}) did not terminate gracefully, forcing kill...")
+                try: process.kill()
+                except Exception as e: self.log(f"Error killing VSF process {process.pid}: {e}")
+            except Exception as e_wait:
+                self.log(f"Error during VSF process wait: {e_wait}. Attempting kill.")
+                try: process.kill()
+                except: pass
+
+
+# --- BatchRunner: resolves the configured paths and runs every video through the scheduler ---
+class BatchRunner:
+    def __init__(self, paths, settings, log_callback, stop_event=None, base_path=BASE_PATH):
+        self.paths = dict(paths) # Settings.ini [Path] values
+        self.settings = dict(settings) # Settings.ini [Settings] values
+        self.log = log_callback
+        self.stop_event = stop_event if stop_event is not None else threading.Event()
+        self.base_path = Path(base_path)
+
+        self.vsf_exe_path = None
+        self.videos_input_dir = None
+        self.general_settings_file = None
+        self.output_dir = None
+        self.crop_profiles = None
+        self.base_crop_settings = None # Crop values of the configured general.cfg
+        self.video_files = []
+        self.jobs = []
+        self.skipped_videos = []
+        self.invalid_videos = [] # (video path, reason) for files rejected by the probing stage
+        self.no_text_videos = [] # Videos the text prescan found no text in
+        self.scheduler = None
+        self.manifest = None
+        self.segment_lock = threading.Lock()
+        self.scheduled_jobs = [] # What the scheduler runs: segment jobs in place of split videos
+        self.batch_started_at = None
+        self.last_progress_log = 0
+        self.progress_lock = threading.Lock()
+
+    def prepare(self):
+        vsf_exe_abs = resolve_path(self.paths.get("videosubfinder_path", ""), self.base_path)
+        if not self.paths.get("videosubfinder_path") or not vsf_exe_abs.is_file():
+            raise BatchConfigError(f"VideoSubFinder Executable not found or is not a file:\n{vsf_exe_abs}")
+        self.vsf_exe_path = str(vsf_exe_abs)
+
+        self.videos_input_dir = resolve_path(self.paths.get("Videos_path", ""), self.base_path)
+        if not self.videos_input_dir.is_dir():
+            raise BatchConfigError(f"Videos input folder does not exist or is not a directory:\n{self.videos_input_dir}")
+
+        self.general_settings_file = None
+        general_settings_path_str = self.paths.get("general_settings", "")
+        if general_settings_path_str:
+            resolved_gs_p = resolve_path(general_settings_path_str, self.base_path)
+            if not resolved_gs_p.exists():
+                self.log(f"Warning: General settings file specified but does not exist:\n{resolved_gs_p}")
+                self.log("VSF will not use the -gs parameter and falls back to its internal defaults.")
+            elif not resolved_gs_p.is_file():
+                raise BatchConfigError(f"The specified general settings path is not a file:\n{resolved_gs_p}")
+            else:
+                self.general_settings_file = resolved_gs_p
+
+        output_rel_or_abs = self.paths.get("output_path", "") or DEFAULT_OUTPUT_RELPATH
+        self.output_dir = resolve_path(output_rel_or_abs, self.base_path)
+        try:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+        except Exception as e:
+            raise BatchConfigError(f"Could not create output directory:\n{self.output_dir}\nError: {e}")
+
+        self.crop_profiles = CropProfiles(self.videos_input_dir, self.log)
+        self.video_files = find_video_files(self.videos_input_dir)
+        return self.video_files
+
+    def build_jobs(self):
+        resume_completed = self.settings.get("resume_completed", "1").strip() == "1"
+        self.base_crop_settings = read_crop_settings(self.general_settings_file)
+
+        jobs = []
+        self.skipped_videos = []
+        self.invalid_videos = []
+        self.no_text_videos = []
+        for video_file_path_obj in self.video_files:
+            stem = video_file_path_obj.stem
+            output_file_prefix = self.output_dir / f"{stem}_Output"
+            command = build_vsf_command(self.vsf_exe_path, video_file_path_obj, output_file_prefix,
+                                        self.settings, self.general_settings_file or "")
+            job = VSFJob(0, 0, stem, str(video_file_path_obj), str(output_file_prefix), command)
+            job.general_settings_file = self.general_settings_file
+            job.log_path = output_file_prefix / VSF_LOG_FILENAME
+            try:
+                job.fingerprint = file_fingerprint(video_file_path_obj)
+            except OSError as e:
+                self.log(f"[{stem}] Warning: Could not read file size/date ({e}).")
+            # Resolution profiles need the frame size: use what the probe cache already knows, checked again after probing
+            self._select_crop(job, get_probe_cache().lookup(video_file_path_obj))
+
+            if resume_completed and job.fingerprint and \
+               self.manifest.is_complete(video_file_path_obj.name, job.fingerprint, job.settings_hash, output_file_prefix):
+                self.skipped_videos.append(video_file_path_obj)
+                continue
+            jobs.append(job)
+
+        jobs = self.probe_stage(jobs)
+        if self.settings.get("letterbox_detection", "0").strip() == "1":
+            self.letterbox_stage(jobs)
+        for job in jobs:
+            self._select_crop(job, job.video_info)
+            if job.crop_profile:
+                self._write_profile_cfg(job)
+        profile_jobs = [job for job in jobs if job.crop_profile]
+        if profile_jobs:
+            self.log(f"{len(profile_jobs)} of {len(jobs)} videos use their own crop ({CROP_PROFILES_FILENAME} or black bar detection).")
+
+        job_order = self.settings.get("job_order", "input").strip() or "input"
+        if job_order not in JOB_ORDER_POLICIES:
+            self.log(f"Warning: Unknown job order '{job_order}', using input order.")
+            job_order = "input"
+        jobs = order_jobs(jobs, job_order)
+        for job in jobs:
+            self._set_time_range(job)
+        if self.settings.get("skip_intro_outro", "0").strip() == "1":
+            self.intro_outro_stage(jobs)
+        if self._prescan_interval_ms():
+            jobs = self.prescan_stage(jobs)
+        segment_settings = self._segment_settings() if jobs else None
+        for idx, job in enumerate(jobs):
+            job.index, job.total = idx + 1, len(jobs)
+            self._plan_segments(job, *segment_settings)
+        self._log_planned_order(jobs, job_order)
+        return jobs
+
+    def _select_crop(self, job, video_info):
+        crop_settings, job.crop_profile = self.crop_profiles.lookup(Path(job.video_path).name, video_info)
+        job.crop_settings = crop_settings or self.base_crop_settings
+        # Profiles are drawn on the video's own frame; only the shared general.cfg crop is fitted to the picture
+        active_area = (video_info or {}).get("active_area")
+        if crop_settings is None and active_area and active_area != FULL_FRAME_AREA and \
+           self.settings.get("letterbox_detection", "0").strip() == "1":
+            job.crop_settings = remap_crop_to_active_area(self.base_crop_settings, active_area)
+            job.crop_profile = (f"{round((active_area[2] - active_area[0]) * video_info.get('width', 0))}x"
+                                f"{round((active_area[3] - active_area[1]) * video_info.get('height', 0))} picture area")
+        # The -gs path is left out of the hash, so the derived general.cfg doesn't need to exist yet
+        job.settings_hash = compute_settings_hash(job.command, job.crop_settings, self._hash_extra())
+
+    def _prescan_interval_ms(self):
+        # Sample interval of the text prescan, 0 = prescan off
+        if self.settings.get("text_prescan", "0").strip() != "1": return 0
+        try:
+            return max(100, int(float(self.settings.get("prescan_interval_seconds", "1") or 1) * 1000))
+        except ValueError:
+            return 1000
+
+    def _hash_extra(self):
+        # Prescanned runs or runs without intros/outros may skip text a full scan would find, so they don't count
+        # as the same settings
+        extra = {}
+        interval_ms = self._prescan_interval_ms()
+        if interval_ms: extra["prescan_interval_ms"] = interval_ms
+        if self.settings.get("skip_intro_outro", "0").strip() == "1": extra["skip_intro_outro"] = True
+        return extra or None
+
+    def _write_profile_cfg(self, job):
+        # VSF only reads the crop from general.cfg, so each profiled job gets a copy with its own four crop keys
+        derived_cfg = self.output_dir / DERIVED_CFG_DIRNAME / f"{job.label}_general.cfg"
+        try:
+            write_derived_general_cfg(self.general_settings_file, job.crop_settings, derived_cfg)
+        except Exception as e:
+            self.log(f"[{job.label}] Warning: Could not write {derived_cfg.name} ({e}); using the general.cfg crop.")
+            job.crop_profile = None
+            job.crop_settings = self.base_crop_settings
+            job.settings_hash = compute_settings_hash(job.command, job.crop_settings, self._hash_extra())
+            return
+        job.general_settings_file = derived_cfg
+        job.command = build_vsf_command(self.vsf_exe_path, job.video_path, job.output_prefix, self.settings, derived_cfg)
+
+    def _set_time_range(self, job):
+        # The part of the video VSF will scan (-s/-e or the whole video), used for segments and progress
+        if not job.video_info or job.video_info.get("duration_ms", 0) <= 0:
+            return
+        duration_ms = job.video_info["duration_ms"]
+        start_time_str = self.settings.get("start_time", "").strip()
+        end_time_str = self.settings.get("end_time", "").strip()
+        range_start_ms = parse_time_to_ms(start_time_str) if start_time_str else 0
+        range_end_ms = parse_time_to_ms(end_time_str) if end_time_str else duration_ms
+        if range_start_ms is None or range_end_ms is None:
+            self.log(f"[{job.label}] Warning: Could not parse the start/end time; the video is not split and has no progress estimate.")
+            return
+        job.range_start_ms, job.range_end_ms = range_start_ms, min(range_end_ms, duration_ms)
+
+    def _segment_settings(self):
+        # (segment_count, overlap_ms, min_length_ms) for _plan_segments
+        try:
+            segment_count = int(self.settings.get("segment_count", "1") or 1)
+            overlap_ms = int(float(self.settings.get("segment_overlap_seconds", "10") or 0) * 1000)
+            min_length_ms = int(float(self.settings.get("segment_min_minutes", "30") or 0) * 60000)
+        except ValueError:
+            self.log("Warning: Invalid segment settings; videos are not split.")
+            return 1, 0, 0
+        # Segments that can only run one after another just add VSF start-ups and a merge
+        if segment_count > 1 and compute_max_concurrent_jobs(self.settings.get("cpu_thread_budget", "").strip(),
+                                                             self.settings.get("number_threads_rgbimages", "").strip(),
+                                                             self.settings.get("number_threads_txtimages", "").strip(),
+                                                             segment_count) <= 1:
+            self.log("Warning: Only one VSF process fits into the CPU thread budget, so long videos are not split into segments. "
+                     "Set the RGB/TXT thread counts so that several processes fit to run segments in parallel.")
+            return 1, overlap_ms, min_length_ms
+        return segment_count, overlap_ms, min_length_ms
+
+    def _plan_segments(self, job, segment_count, overlap_ms, min_length_ms):
+        # Text prescan ranges (or the whole range) become separate VSF runs; long ones are split into segments
+        if job.text_ranges:
+            time_ranges = job.text_ranges
+        elif job.range_end_ms is not None:
+            time_ranges = [(job.range_start_ms, job.range_end_ms)]
+        else:
+            return
+        if job.excluded_ranges:
+            remaining_ranges = subtract_time_ranges(time_ranges, job.excluded_ranges)
+            if remaining_ranges:
+                time_ranges = remaining_ranges
+            else:
+                self.log(f"[{job.label}] Warning: Nothing is left after removing the intro/outro; scanning it anyway.")
+        narrowed = list(time_ranges) != [(job.range_start_ms, job.range_end_ms)]
+
+        plan = []
+        for range_start_ms, range_end_ms in time_ranges:
+            if segment_count > 1 and range_end_ms - range_start_ms >= max(min_length_ms, 1):
+                plan.extend(plan_time_segments(range_start_ms, range_end_ms, segment_count, overlap_ms))
+            else: # Prescan ranges don't overlap, so every image of the run is kept
+                plan.append({"run_start_ms": range_start_ms, "run_end_ms": range_end_ms, "own_start_ms": None, "own_end_ms": None})
+        if len(plan) == 1 and narrowed:
+            # A single range needs no separate output folder: the video's own run just gets -s/-e
+            job.range_start_ms, job.range_end_ms = plan[0]["run_start_ms"], plan[0]["run_end_ms"]
+            job.command = build_vsf_command(self.vsf_exe_path, job.video_path, job.output_prefix, self.settings,
+                                            job.general_settings_file or "",
+                                            start_time=format_vsf_time(job.range_start_ms), end_time=format_vsf_time(job.range_end_ms))
+            job.log_suffix = f" [{format_duration_ms(job.range_start_ms)}-{format_duration_ms(job.range_end_ms)}]"
+            return
+        if len(plan) <= 1:
+            return
+
+        shutil.rmtree(Path(job.output_prefix) / SEGMENTS_DIRNAME, ignore_errors=True) # Leftovers of an interrupted run
+        for i, segment in enumerate(plan):
+            segment_prefix = Path(job.output_prefix) / SEGMENTS_DIRNAME / f"seg{i+1:02d}"
+            command = build_vsf_command(self.vsf_exe_path, job.video_path, segment_prefix, self.settings,
+                                        job.general_settings_file or "",
+                                        start_time=format_vsf_time(segment["run_start_ms"]),
+                                        end_time=format_vsf_time(segment["run_end_ms"]))
+            segment_job = VSFJob(job.index, job.total, f"{job.label} [{i+1}/{len(plan)}]", job.video_path, str(segment_prefix), command)
+            segment_job.parent = job
+            segment_job.log_path = Path(job.output_prefix) / VSF_LOG_FILENAME.replace(".log", f"_seg{i+1:02d}.log")
+            segment_job.video_info = job.video_info
+            segment_job.own_start_ms = segment["own_start_ms"]
+            segment_job.own_end_ms = segment["own_end_ms"]
+            segment_job.range_start_ms, segment_job.range_end_ms = segment["run_start_ms"], segment["run_end_ms"]
+            segment_job.log_suffix = (f" [segment {i+1}/{len(plan)}: {format_duration_ms(segment['run_start_ms'])}"
+                                      f"-{format_duration_ms(segment['run_end_ms'])}]")
+            job.segments.append(segment_job)
+
+    def _log_planned_order(self, jobs, job_order):
+        if not jobs:
+            return
+        self.log(f"Planned order ({job_order.replace('_', ' ')}):")
+        for job in jobs:
+            info = job.video_info
+            details = f"{format_duration_ms(info.get('duration_ms', 0))}, {info.get('width')}x{info.get('height')}" if info else "no video info"
+            if job.crop_profile: details += f", {job.crop_profile} crop"
+            if job.text_ranges:
+                details += f", text in {len(job.text_ranges)} ranges ({format_duration_ms(sum(e - s for s, e in job.text_ranges))})"
+            if job.excluded_ranges:
+                details += f", {format_duration_ms(sum(e - s for s, e in job.excluded_ranges))} intro/outro left out"
+            if job.segments: details += f", split into {len(job.segments)} segments"
+            self.log(f"  {job.index:>3}. {Path(job.video_path).name} ({details})")
+
+    def probe_stage(self, jobs):
+        # Learn duration/size of every queued video before any VSF launch, and drop unreadable files up front
+        if not jobs or self.stop_event.is_set():
+            return jobs
+        try:
+            probe_workers = int(self.settings.get("probe_workers", "8") or 8)
+        except ValueError:
+            probe_workers = 8
+
+        self.log(f"Probing {len(jobs)} videos ({probe_workers} at a time)...")
+        probe_start_time = perf_time()
+        try:
+            results = probe_videos([job.video_path for job in jobs], get_probe_cache(), probe_workers, self.stop_event)
+        except FFprobeNotFoundError as e:
+            self.log(f"Warning: {e} Skipping the probing stage; videos are not checked before processing.")
+            return jobs
+
+        valid_jobs = []
+        for job in jobs:
+            if job.video_path not in results:
+                continue # Not probed before Stop: neither valid nor rejected, so the manifest is left alone
+            info, error = results[job.video_path]
+            if error:
+                self.invalid_videos.append((job.video_path, error))
+                self.log(f"[{job.label}] Rejected: {error}")
+                self.manifest.mark(Path(job.video_path).name, "invalid", video_path=job.video_path,
+                                   fingerprint=job.fingerprint, error=error)
+                continue
+            job.video_info = info
+            valid_jobs.append(job)
+
+        total_duration_ms = sum(job.video_info.get("duration_ms", 0) for job in valid_jobs)
+        total_frames = sum(job.video_info.get("total_frames", 0) for job in valid_jobs)
+        self.log(f"Probed {len(results)} videos in {perf_time() - probe_start_time:.1f}s: {len(valid_jobs)} valid, "
+                 f"{len(self.invalid_videos)} rejected. Total duration {format_duration_ms(total_duration_ms)}, {total_frames} frames.")
+        return valid_jobs
+
+    def letterbox_stage(self, jobs):
+        # Finds the picture area inside black bars; stored with the ffprobe data, so each file is checked once
+        pending = [job for job in jobs if job.video_info and "active_area" not in job.video_info]
+        if not pending or self.stop_event.is_set():
+            return
+        try:
+            from vsf_analysis import detect_active_area # OpenCV/NumPy are only needed when this stage is enabled
+        except ImportError as e:
+            self.log(f"Warning: Black bar detection needs OpenCV and NumPy ({e}); crops are not adjusted.")
+            return
+
+        self.log(f"Detecting black bars in {len(pending)} videos...")
+        detect_start_time = perf_time()
+        probe_cache = get_probe_cache()
+        with ThreadPoolExecutor(max_workers=max(1, min(len(pending), os.cpu_count() or 1))) as executor:
+            futures = {executor.submit(detect_active_area, job.video_path, job.video_info, stop_event=self.stop_event): job
+                       for job in pending}
+            for future in as_completed(futures):
+                job = futures[future]
+                try:
+                    active_area = future.result()
+                except Exception as e:
+                    self.log(f"[{job.label}] Warning: Black bar detection failed ({e}).")
+                    continue
+                if active_area is None: continue # Only black frames sampled (or stopped): check again next run
+                job.video_info = dict(job.video_info, active_area=active_area)
+                probe_cache.store(job.video_path, job.video_info)
+        probe_cache.flush()
+        bar_count = sum(1 for job in jobs if job.video_info and job.video_info.get("active_area", FULL_FRAME_AREA) != FULL_FRAME_AREA)
+        self.log(f"Black bar detection finished in {perf_time() - detect_start_time:.1f}s: {bar_count} of {len(jobs)} videos have black bars.")
+
+    def intro_outro_stage(self, jobs):
+        # Fingerprints the start and end of every episode (cached in cache/fingerprints/) and leaves out the
+        # sequences that at least two episodes share. Videos finished in earlier runs are matched too, so a new
+        # episode added to a finished season still has neighbours; only the pending jobs get exclusions.
+        if not jobs or self.stop_event.is_set():
+            return
+        probe_cache = get_probe_cache()
+        pending_by_path = {job.video_path: job for job in jobs}
+        episodes = {} # video path -> video info, in file name order
+        for video_file_path_obj in sorted(self.video_files, key=lambda path: path.name.lower()):
+            job = pending_by_path.get(str(video_file_path_obj))
+            if job is not None:
+                info = job.video_info
+            else:
+                try:
+                    info = probe_cache.get_video_info(video_file_path_obj, save=False)
+                except Exception:
+                    continue # Unreadable files were already rejected by the probing stage
+            if info and info.get("duration_ms", 0) > 0:
+                episodes[str(video_file_path_obj)] = info
+        if len(episodes) < 2:
+            self.log("Intro/outro detection needs at least two videos in the input folder; nothing is left out.")
+            return
+        try:
+            from vsf_analysis import find_shared_sequences, get_episode_fingerprint
+        except ImportError as e:
+            self.log(f"Warning: Intro/outro detection needs OpenCV and NumPy ({e}); nothing is left out.")
+            return
+
+        self.log(f"Looking for intros/outros shared by {len(episodes)} videos ({len(jobs)} to process)...")
+        detect_start_time = perf_time()
+        fingerprints = {}
+        with ThreadPoolExecutor(max_workers=max(1, min(len(episodes), os.cpu_count() or 1))) as executor:
+            futures = {executor.submit(get_episode_fingerprint, video_path, info, self.stop_event): video_path
+                       for video_path, info in episodes.items()}
+            for future in as_completed(futures):
+                video_path = futures[future]
+                try:
+                    hashes = future.result()
+                except Exception as e:
+                    self.log(f"[{Path(video_path).stem}] Warning: Intro/outro fingerprinting failed ({e}).")
+                    continue
+                if hashes is None: continue # Stopped
+                fingerprints[video_path] = hashes
+        if self.stop_event.is_set() or len(fingerprints) < 2:
+            return
+
+        # Cache hits and finished scans arrive in no fixed order; match the episodes in file name order
+        fingerprints = {video_path: fingerprints[video_path] for video_path in episodes if video_path in fingerprints}
+        shared = find_shared_sequences(fingerprints)
+        excluded_total_ms = 0
+        for job in jobs:
+            parts = shared.get(job.video_path, {})
+            job.excluded_ranges = [tuple(parts[part]) for part in ("intro", "outro") if parts.get(part)]
+            notes = [f"{part} {format_duration_ms(parts[part][0])}-{format_duration_ms(parts[part][1])}"
+                     for part in ("intro", "outro") if parts.get(part)]
+            if notes:
+                self.log(f"[{job.label}] Leaving out {' and '.join(notes)}.")
+            excluded_total_ms += sum(e - s for s, e in job.excluded_ranges)
+        self.log(f"Intro/outro detection finished in {perf_time() - detect_start_time:.1f}s: "
+                 f"{format_duration_ms(excluded_total_ms)} left out across {len(jobs)} videos.")
+
+    def prescan_stage(self, jobs):
+        # Cheap pass over the crop band that finds where text is on screen; cached with the ffprobe data per crop,
+        # interval and -s/-e range. Videos without any text are dropped here.
+        interval_ms = self._prescan_interval_ms()
+        pending = [job for job in jobs if job.video_info and job.range_end_ms is not None]
+        if not pending or self.stop_event.is_set():
+            return jobs
+        try:
+            from vsf_analysis import prescan_text_ranges # OpenCV/NumPy are only needed when this stage is enabled
+        except ImportError as e:
+            self.log(f"Warning: The text prescan needs OpenCV and NumPy ({e}); whole videos are scanned.")
+            return jobs
+
+        def prescan_key(job):
+            payload = json.dumps([job.crop_settings, interval_ms, job.range_start_ms, job.range_end_ms], sort_keys=True)
+            return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+        self.log(f"Prescanning {len(pending)} videos for on-screen text (one sample every {interval_ms / 1000:g}s)...")
+        prescan_start_time = perf_time()
+        probe_cache = get_probe_cache()
+        results = {}
+        to_scan = []
+        for job in pending:
+            cached = job.video_info.get("text_prescan")
+            if cached and cached.get("key") == prescan_key(job):
+                results[job.video_path] = cached["ranges"]
+            else:
+                to_scan.append(job)
+        with ThreadPoolExecutor(max_workers=max(1, min(len(to_scan), os.cpu_count() or 1))) as executor:
+            futures = {executor.submit(prescan_text_ranges, job.video_path, job.video_info, job.crop_settings, job.range_start_ms,
+                                       job.range_end_ms, interval_ms, self.stop_event): job for job in to_scan}
+            for future in as_completed(futures):
+                job = futures[future]
+                try:
+                    ranges = future.result()
+                except Exception as e:
+                    self.log(f"[{job.label}] Warning: Text prescan failed ({e}); the whole video is scanned.")
+                    continue
+                if ranges is None: continue # Stopped
+                results[job.video_path] = ranges
+                job.video_info = dict(job.video_info, text_prescan={"key": prescan_key(job), "ranges": ranges})
+                probe_cache.store(job.video_path, job.video_info)
+        probe_cache.flush()
+        if self.stop_event.is_set():
+            return jobs
+
+        kept_jobs = []
+        for job in jobs:
+            ranges = results.get(job.video_path)
+            if ranges is None:
+                kept_jobs.append(job)
+            elif not ranges:
+                self.no_text_videos.append(job.video_path)
+                self.log(f"[{job.label}] No on-screen text found in the crop area; skipped.")
+                self.manifest.mark(Path(job.video_path).name, "no_text", video_path=job.video_path,
+                                   fingerprint=job.fingerprint, settings_hash=job.settings_hash)
+            else:
+                job.text_ranges = [tuple(r) for r in ranges]
+                kept_jobs.append(job)
+        scanned_ms = sum(job.range_end_ms - job.range_start_ms for job in pending if job.video_path in results)
+        text_ms = sum(e - s for job in kept_jobs if job.text_ranges for s, e in job.text_ranges)
+        self.log(f"Prescan finished in {perf_time() - prescan_start_time:.1f}s: text in {format_duration_ms(text_ms)} of "
+                 f"{format_duration_ms(scanned_ms)}, {len(self.no_text_videos)} videos without text.")
+        return kept_jobs
+
+    def _on_job_started(self, job):
+        video_job = job.parent or job
+        with self.segment_lock:
+            first_start = video_job.start_time is None
+            if first_start: video_job.start_time = perf_time()
+        if first_start:
+            self.manifest.mark(Path(video_job.video_path).name, "running", video_path=video_job.video_path,
+                               fingerprint=video_job.fingerprint, settings_hash=video_job.settings_hash)
+
+    def _on_job_finished(self, job):
+        job.progress = 1.0 # Counts as processed for the batch estimate, whatever the outcome
+        if job.parent is not None:
+            with self.segment_lock:
+                job.parent.segments_finished += 1
+                if job.parent.segments_finished < len(job.parent.segments):
+                    return
+            self._finish_segmented_video(job.parent)
+            return
+        self._mark_video_finished(job)
+
+    def _on_job_progress(self, job):
+        now = perf_time()
+        with self.progress_lock:
+            if now - self.last_progress_log < PROGRESS_LOG_INTERVAL_S: return
+            self.last_progress_log = now
+        self.log(self._format_progress(now))
+
+    def _format_progress(self, now):
+        job_notes = []
+        for job in self.scheduler.running_jobs():
+            if job.progress is None: continue
+            eta_s = estimate_remaining_s(now - job.started_at, job.progress)
+            job_notes.append(f"{job.label} {job.progress:.0%}" + (f" (ETA {format_duration_ms(eta_s * 1000)})" if eta_s is not None else ""))
+        # Batch progress weights every scheduled job by the length of video it scans
+        weights = [(job.range_end_ms - job.range_start_ms) if job.range_end_ms else 1 for job in self.scheduled_jobs]
+        done = sum(weight * (job.progress or 0) for weight, job in zip(weights, self.scheduled_jobs))
+        batch_fraction = done / sum(weights) if sum(weights) else 0
+        batch_eta_s = estimate_remaining_s(now - self.batch_started_at, batch_fraction)
+        batch_note = f"Batch {batch_fraction:.0%}" + (f", ETA {format_duration_ms(batch_eta_s * 1000)}" if batch_eta_s is not None else "")
+        return f"Progress: {', '.join(job_notes) or 'waiting for VSF output'} | {batch_note}"
+
+    def _mark_video_finished(self, job):
+        self.manifest.mark(Path(job.video_path).name, job.status, return_code=job.return_code, time_used=job.time_used,
+                           duration_ms=job.video_info.get("duration_ms", 0) if job.video_info else 0)
+
+    def _finish_segmented_video(self, job):
+        segment_statuses = [segment.status for segment in job.segments]
+        job.return_code = next((s.return_code for s in job.segments if s.return_code not in (0, None)), 0)
+        job.time_used = round(perf_time() - job.start_time) if job.start_time else 0
+
+        if all(status == "done" for status in segment_statuses):
+            try:
+                merged_count, duplicate_count = merge_segment_outputs(job.output_prefix, job.segments)
+                job.status = "done"
+                self.log(f"[{job.label}] All {len(job.segments)} segments finished in {format_duration_ms(job.time_used * 1000)}: "
+                         f"merged {merged_count} images, dropped {duplicate_count} duplicates from the overlaps.")
+            except Exception as e:
+                job.status = "failed"
+                self.log(f"[{job.label}] Error merging segment outputs: {e}")
+        elif "pending" in segment_statuses or "interrupted" in segment_statuses:
+            job.status = "interrupted" if self.stop_event.is_set() else "failed"
+        else:
+            job.status = "failed"
+            self.log(f"[{job.label}] {segment_statuses.count('failed')} of {len(job.segments)} segments failed; outputs were not merged.")
+        self._mark_video_finished(job)
+
+    def _log_batch_estimate(self, max_concurrent_jobs):
+        # Wall time per second of video, learned from earlier runs recorded in the manifest
+        seconds_per_video_second = self.manifest.processing_speed()
+        total_duration_ms = sum(job.video_info.get("duration_ms", 0) for job in self.jobs if job.video_info)
+        if seconds_per_video_second is None or total_duration_ms <= 0:
+            return
+        estimate_ms = total_duration_ms * seconds_per_video_second / max(1, max_concurrent_jobs)
+        self.log(f"Estimated batch time: ~{format_duration_ms(estimate_ms)} (from earlier runs in this output folder).")
+
+    def run(self):
+        # Derived general.cfg files are only needed while VSF runs; remove them on every exit path (stop,
+        # rejected or text-less videos, nothing left to do, errors)
+        try:
+            return self._run()
+        finally:
+            if self.output_dir is not None:
+                shutil.rmtree(self.output_dir / DERIVED_CFG_DIRNAME, ignore_errors=True)
+
+    def _run(self):
+        if not self.video_files:
+            self.log(f"No video files ({', '.join(VIDEO_FILE_EXTENSIONS)}) found in the input directory: {self.videos_input_dir}")
+            return EXIT_CONFIG_ERROR
+
+        self.manifest = BatchManifest(self.output_dir, self.log)
+        self.jobs = self.build_jobs()
+        if self.skipped_videos:
+            self.log(f"Skipping {len(self.skipped_videos)} videos already completed with the same settings "
+                     f"(see {MANIFEST_FILENAME}): {', '.join(p.name for p in self.skipped_videos)}")
+        if not self.jobs:
+            if self.stop_event.is_set():
+                self.log("Processing stopped by user.")
+            elif self.invalid_videos:
+                self.log("No valid videos left to process.")
+            elif self.no_text_videos:
+                self.log("No videos with on-screen text left to process.")
+            else:
+                self.log("All videos are already processed. Nothing to do.")
+            return self.exit_code()
+
+        # Split videos are scheduled segment by segment, in the planned video order
+        scheduled_jobs = [scheduled for job in self.jobs for scheduled in (job.segments or [job])]
+        self.scheduled_jobs = scheduled_jobs
+
+        cpu_thread_budget_val = self.settings.get("cpu_thread_budget", "").strip()
+        max_concurrent_jobs = compute_max_concurrent_jobs(cpu_thread_budget_val,
+                                                          self.settings.get("number_threads_rgbimages", "").strip(),
+                                                          self.settings.get("number_threads_txtimages", "").strip(),
+                                                          len(scheduled_jobs))
+        if max_concurrent_jobs > 1:
+            self.log(f"Running up to {max_concurrent_jobs} videos at once (CPU thread budget: {cpu_thread_budget_val or os.cpu_count()}).")
+        self._log_batch_estimate(max_concurrent_jobs)
+
+        self.scheduler = VSFJobScheduler(max_concurrent_jobs, self.stop_event, self.log,
+                                         job_started_callback=self._on_job_started,
+                                         job_finished_callback=self._on_job_finished,
+                                         job_progress_callback=self._on_job_progress)
+        self.batch_started_at = perf_time()
+        self.last_progress_log = self.batch_started_at
+        self.scheduler.run(scheduled_jobs)
+        for job in self.jobs:
+            # Split videos whose remaining segments never started (stop or fatal error) still need a final status
+            if job.segments and job.start_time is not None and job.segments_finished < len(job.segments):
+                self._finish_segmented_video(job)
+        if self.stop_event.is_set():
+            self.log("Processing stopped by user.")
+        else:
+            failed = [job.label for job in self.jobs if job.status == "failed"]
+            finished = sum(1 for job in self.jobs if job.status == "done")
+            self.log(f"Batch summary: {finished} of {len(self.jobs)} videos completed, {len(failed)} failed{': ' + ', '.join(failed) if failed else ''}"
+                     f"{f', {len(self.invalid_videos)} rejected' if self.invalid_videos else ''}"
+                     f"{f', {len(self.no_text_videos)} without text' if self.no_text_videos else ''}"
+                     f"{f', {len(self.skipped_videos)} skipped' if self.skipped_videos else ''}.")
+        return self.exit_code()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.scheduler:
+            self.scheduler.terminate_all()
+
+    def exit_code(self):
+        if self.stop_event.is_set():
+            return EXIT_INTERRUPTED
+        if self.scheduler is None:
+            if self.jobs: return EXIT_JOBS_FAILED # Videos were pending but never ran
+        elif self.scheduler.fatal_error:
+            return EXIT_JOBS_FAILED
+        # Videos the prescan found no text in were skipped on purpose and don't count as failures
+        if self.invalid_videos or any(job.status != "done" for job in self.jobs):
+            return EXIT_JOBS_FAILED
+        return EXIT_OK
+
+
+# --- Headless command line entry point ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=f"{APP_NAME} - headless batch mode (no GUI).")
+    parser.add_argument("--settings", default=str(BASE_PATH / SETTINGS_FILE), help=f"Path to {SETTINGS_FILE} (default: next to this script)")
+    parser.add_argument("--vsf", help="Override [Path] videosubfinder_path")
+    parser.add_argument("--input", help="Override [Path] Videos_path")
+    parser.add_argument("--general-cfg", help="Override [Path] general_settings")
+    parser.add_argument("--output", help="Override [Path] output_path")
+    parser.add_argument("--cpu-thread-budget", help="Override [Settings] cpu_thread_budget")
+    parser.add_argument("--force", action="store_true", help="Reprocess every video, even ones the manifest records as done")
+    parser.add_argument("--probe-workers", help="Override [Settings] probe_workers")
+    parser.add_argument("--order", choices=JOB_ORDER_POLICIES, help="Override [Settings] job_order")
+    parser.add_argument("--segments", help="Override [Settings] segment_count (split long videos into N parallel segments)")
+    parser.add_argument("--letterbox", action="store_true", help="Fit the general.cfg crop to the picture area of videos with black bars")
+    parser.add_argument("--prescan", action="store_true", help="Run VSF only on the time ranges where a quick prescan finds text")
+    parser.add_argument("--skip-intro-outro", action="store_true", help="Leave out opening/ending sequences shared by the videos of the batch")
+    args = parser.parse_args(argv)
+
+    def log_stdout(message):
+        print(message, flush=True)
+
+    paths, settings = load_settings_ini(args.settings, log_stdout)
+    # Paths in Settings.ini are relative to the script folder, paths given on the command line to the working directory
+    if args.vsf is not None: paths["videosubfinder_path"] = str(Path(args.vsf).resolve())
+    if args.input is not None: paths["Videos_path"] = str(Path(args.input).resolve())
+    if args.general_cfg is not None: paths["general_settings"] = str(Path(args.general_cfg).resolve()) if args.general_cfg else ""
+    if args.output is not None: paths["output_path"] = str(Path(args.output).resolve())
+    if args.cpu_thread_budget is not None: settings["cpu_thread_budget"] = args.cpu_thread_budget
+    if args.force: settings["resume_completed"] = "0"
+    if args.probe_workers is not None: settings["probe_workers"] = args.probe_workers
+    if args.order is not None: settings["job_order"] = args.order
+    if args.segments is not None: settings["segment_count"] = args.segments
+    if args.letterbox: settings["letterbox_detection"] = "1"
+    if args.prescan: settings["text_prescan"] = "1"
+    if args.skip_intro_outro: settings["skip_intro_outro"] = "1"
+
+    runner = BatchRunner(paths, settings, log_stdout)
+    try:
+        video_files = runner.prepare()
+    except BatchConfigError as e:
+        log_stdout(f"Error: {e}")
+        return EXIT_CONFIG_ERROR
+    log_stdout(f"Found {len(video_files)} video files to process in {runner.videos_input_dir}.")
+
+    def handle_stop_signal(signum, frame):
+        log_stdout("--- Stopping Video Processing ---")
+        runner.stop()
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, handle_stop_signal)
+
+    result = {}
+    run_thread = threading.Thread(target=lambda: result.setdefault("code", runner.run()), daemon=True)
+    run_thread.start()
+    while run_thread.is_alive():
+        try:
+            run_thread.join(timeout=0.5)
+        except KeyboardInterrupt:
+            handle_stop_signal(None, None)
+
+    log_stdout("--- Video Processing Finished ---")
+    return result.get("code", EXIT_JOBS_FAILED)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,524 @@
+# -*- coding: utf-8 -*-
+# Frame preview pipeline used by the crop editor in Batch_VideoSubFinder.py.
+# Like vsf_batch.py, nothing in this module may import customtkinter/tkinter.
+import bisect
+import hashlib
+import json
+import os
+import subprocess
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+import cv2
+import numpy as np
+
+from vsf_batch import (
+    CACHE_DIR, FFMPEG_PATH, FFPROBE_PATH, FFprobeNotFoundError, ProbeError, file_fingerprint, get_ffmpeg_command,
+    get_ffprobe_command, get_probe_cache, hidden_startupinfo, tool_not_found_message,
+)
+
+# --- Decoded frame cache ---
+FRAME_CACHE_MAX_MB = 256 # Display-sized frames kept across seeks (and across crop editor windows)
+FALLBACK_FRAME_MS = 40 # Bucket width when the frame rate is unknown
+
+def frame_bucket(time_ms, fps):
+    # Positions inside the same frame interval share one cache entry
+    if fps and fps > 0:
+        return int(time_ms * fps / 1000.0)
+    return int(time_ms // FALLBACK_FRAME_MS)
+
+def fit_size(width, height, box_width, box_height):
+    # Largest size with the frame's aspect ratio that fits in the box, never larger than the frame itself
+    if width <= 0 or height <= 0 or box_width <= 0 or box_height <= 0:
+        return max(1, width), max(1, height)
+    scale = min(box_width / width, box_height / height, 1.0)
+    return max(1, int(width * scale)), max(1, int(height * scale))
+
+class FrameCache:
+    # LRU of display-sized PIL images keyed by (video path, frame bucket), bounded by memory rather than entry count
+    def __init__(self, max_mb=FRAME_CACHE_MAX_MB):
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.entries = OrderedDict() # (video path, bucket) -> (image, size in bytes)
+        self.current_bytes = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, video_path, bucket, min_size=(0, 0)):
+        key = (str(video_path), bucket)
+        with self.lock:
+            entry = self.entries.get(key)
+            # A frame cached while the window was smaller would look soft now; decode it again
+            if entry is None or entry[0].width + 1 < min_size[0]:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, video_path, bucket, image):
+        key = (str(video_path), bucket)
+        size_bytes = image.width * image.height * len(image.getbands())
+        if size_bytes > self.max_bytes:
+            return
+        with self.lock:
+            old_entry = self.entries.pop(key, None)
+            if old_entry:
+                self.current_bytes -= old_entry[1]
+            self.entries[key] = (image, size_bytes)
+            self.current_bytes += size_bytes
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_bytes) = self.entries.popitem(last=False)
+                self.current_bytes -= evicted_bytes
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.current_bytes = 0
+
+_frame_cache = None
+_frame_cache_lock = threading.Lock()
+
+def get_frame_cache():
+    # Shared by every crop editor window opened during the session
+    global _frame_cache
+    with _frame_cache_lock:
+        if _frame_cache is None:
+            _frame_cache = FrameCache()
+        return _frame_cache
+
+
+# --- Display-size conversion ---
+class FrameScaler:
+    # Turns decoded BGR frames into display-sized RGB arrays: the INTER_AREA downscale runs first, so the colour
+    # conversion and the PIL handoff only touch display-sized pixels. All buffers are reused from frame to frame,
+    # so one instance must only be used by one thread.
+    def __init__(self):
+        self.frame_buffer = None # Full-size decode target passed to VideoCapture.read()/retrieve()
+        self.size = None
+        self.scaled_buffer = None
+        self.rgb_buffer = None
+
+    def to_display_rgb(self, bgr_frame, display_size):
+        width, height = display_size
+        if self.size != display_size:
+            self.scaled_buffer = np.empty((height, width, 3), dtype=np.uint8)
+            self.rgb_buffer = np.empty((height, width, 3), dtype=np.uint8)
+            self.size = display_size
+        source = bgr_frame
+        if (bgr_frame.shape[1], bgr_frame.shape[0]) != display_size:
+            cv2.resize(bgr_frame, display_size, dst=self.scaled_buffer, interpolation=cv2.INTER_AREA)
+            source = self.scaled_buffer
+        cv2.cvtColor(source, cv2.COLOR_BGR2RGB, dst=self.rgb_buffer)
+        # Image.fromarray() copies 3-channel data, so the returned buffer can be overwritten by the next frame
+        return self.rgb_buffer
+
+
+# --- Background decoding ---
+class LatestRequestWorker:
+    # One worker thread runs handler(request) for the newest request only: requests that arrive while a decode is
+    # running replace each other, so a fast slider drag costs one decode at a time and ends on the final position.
+    # result_callback(request, result) is called from the worker thread.
+    def __init__(self, handler, result_callback, name="PreviewDecoder"):
+        self.handler = handler
+        self.result_callback = result_callback
+        self.condition = threading.Condition()
+        self.pending_request = None
+        self.closed = False
+        self.dropped_requests = 0
+        self.thread = threading.Thread(target=self._worker_loop, name=name, daemon=True)
+        self.thread.start()
+
+    def request(self, request):
+        with self.condition:
+            if self.pending_request is not None:
+                self.dropped_requests += 1
+            self.pending_request = request
+            self.condition.notify()
+
+    def _worker_loop(self):
+        while True:
+            with self.condition:
+                while self.pending_request is None and not self.closed:
+                    self.condition.wait()
+                if self.closed:
+                    return
+                request, self.pending_request = self.pending_request, None
+            try:
+                result = self.handler(request)
+            except Exception as e:
+                print(f"WARN: Preview decode failed: {e}")
+                continue
+            if not self.closed:
+                self.result_callback(request, result)
+
+    def close(self, timeout=1.0):
+        with self.condition:
+            self.closed = True
+            self.pending_request = None
+            self.condition.notify()
+        if self.thread is not threading.current_thread():
+            self.thread.join(timeout)
+
+
+# --- Keyframe index ---
+# Built once per video from ffprobe's packet list and stored in cache/keyframes/, next to the probe cache.
+KEYFRAME_CACHE_DIR = CACHE_DIR / "keyframes"
+KEYFRAME_INDEX_VERSION = 2 # Bumped when the stored times change meaning (2: relative to the stream's start_time)
+MAX_FORWARD_DECODE_FRAMES = 1000 # Safety limit when decoding forward from a keyframe
+
+def keyframe_index_file(video_path):
+    key = os.path.normcase(os.path.abspath(str(video_path)))
+    return KEYFRAME_CACHE_DIR / (hashlib.sha1(key.encode("utf-8")).hexdigest() + ".json")
+
+def probe_keyframes(video_path):
+    # Reads packet headers only (no decoding), so it costs about one pass over the file
+    command = [get_ffprobe_command(), "-v", "error", "-select_streams", "v:0",
+               "-show_entries", "stream=start_time:packet=pts_time,flags", "-of", "csv=p=1", str(video_path)]
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, check=True, startupinfo=hidden_startupinfo(),
+                                encoding='utf-8', errors='replace')
+    except FileNotFoundError: raise FFprobeNotFoundError(tool_not_found_message("ffprobe", FFPROBE_PATH))
+    except subprocess.CalledProcessError as e: raise ProbeError(f"ffprobe error: {e.stderr if e.stderr else 'Unknown error'}")
+
+    start_time_s = 0.0
+    keyframe_times_s = []
+    for line in result.stdout.splitlines():
+        section, _, fields = line.strip().partition(",")
+        if section == "stream":
+            try: start_time_s = float(fields)
+            except ValueError: pass # start_time "N/A"
+            continue
+        pts_time, _, flags = fields.partition(",")
+        if section != "packet" or "K" not in flags: continue
+        try: keyframe_times_s.append(float(pts_time))
+        except ValueError: continue # pts_time "N/A"
+    # Packet times include the stream's start_time (often non-zero in TS/MKV), while OpenCV's
+    # CAP_PROP_POS_MSEC counts from the first frame
+    return sorted({max(0, int(round((pts_time - start_time_s) * 1000))) for pts_time in keyframe_times_s})
+
+def get_keyframe_index(video_path):
+    # Cached list of keyframe times in ms, rebuilt when the file's size or mtime changed
+    index_file = keyframe_index_file(video_path)
+    fingerprint = file_fingerprint(video_path)
+    try:
+        with open(index_file, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if cached.get("version") == KEYFRAME_INDEX_VERSION and cached.get("fingerprint") == fingerprint:
+            return cached["keyframes_ms"]
+    except Exception:
+        pass # Missing or unreadable index is rebuilt
+
+    keyframes_ms = probe_keyframes(video_path)
+    try:
+        index_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = index_file.with_suffix(".json.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": KEYFRAME_INDEX_VERSION, "path": str(video_path), "fingerprint": fingerprint,
+                       "keyframes_ms": keyframes_ms}, f)
+        os.replace(tmp_path, index_file)
+    except Exception as e:
+        print(f"WARN: Could not write keyframe index {index_file}: {e}")
+    return keyframes_ms
+
+def preceding_keyframe_ms(keyframes_ms, time_ms):
+    # Latest keyframe at or before time_ms (the first keyframe if time_ms is before all of them)
+    if not keyframes_ms: return 0
+    pos = bisect.bisect_right(keyframes_ms, time_ms)
+    return keyframes_ms[max(0, pos - 1)]
+
+
+# --- Preview backends ---
+# A frame source turns (time_ms, display_size) into a display-sized RGB array. The array is a reused buffer, so a
+# source belongs to a single decoder thread and the caller copies it (Image.fromarray) before the next read.
+PREVIEW_BACKENDS = ["opencv", "ffmpeg"]
+FFMPEG_PIPE_FORWARD_MS = 5000 # Targets further ahead than this restart ffmpeg instead of reading through the pipe
+SEQUENTIAL_READ_MAX_FRAMES = 30 # Targets up to this many frames ahead are decoded forward instead of seeking
+RECENT_FRAMES_RING_SIZE = 60 # Frames kept per source for stepping back without a seek
+
+class FrameSource:
+    name = ""
+
+    def __init__(self, video_path, fps):
+        self.video_path = str(video_path)
+        self.fps = fps
+        self.keyframes_ms = None # Optional keyframe index (get_keyframe_index), set once it is loaded
+        self.decode_count = 0
+        self.decode_seconds = 0.0
+        self.position_ms = None # Time of the frame decoded last
+        # Ring of recently decoded display-sized frames, filled while stepping: frame index -> RGB array
+        self.recent_frames = OrderedDict()
+
+    def read_frame_at(self, time_ms, display_size, keep_recent=False):
+        # keep_recent (frame stepping): serve the frame from the ring if possible, and remember the frames
+        # decoded on the way so stepping back over them needs no seek
+        if keep_recent:
+            recent_frame = self.recent_frames.get(frame_bucket(time_ms, self.fps))
+            if recent_frame is not None and recent_frame.shape[:2] == (display_size[1], display_size[0]):
+                return recent_frame
+        start_time = perf_counter()
+        rgb_frame = self._read_frame(time_ms, display_size, keep_recent)
+        if rgb_frame is not None:
+            self.decode_count += 1
+            self.decode_seconds += perf_counter() - start_time
+            if keep_recent: self._remember_frame(self.position_ms, rgb_frame)
+        return rgb_frame
+
+    def _remember_frame(self, position_ms, rgb_frame):
+        if position_ms is None: return
+        frame_index = int(round(position_ms / self._frame_ms()))
+        self.recent_frames[frame_index] = rgb_frame.copy() # The source's buffers are overwritten by the next read
+        self.recent_frames.move_to_end(frame_index)
+        while len(self.recent_frames) > RECENT_FRAMES_RING_SIZE:
+            self.recent_frames.popitem(last=False)
+
+    def _continues_forward(self, time_ms):
+        # True when time_ms is a little ahead of the last decoded frame, or in the GOP being decoded
+        if self.position_ms is None: return False
+        frame_ms = self._frame_ms()
+        if self.position_ms + frame_ms / 2 >= time_ms: return False
+        if time_ms - self.position_ms <= SEQUENTIAL_READ_MAX_FRAMES * frame_ms: return True
+        return bool(self.keyframes_ms) and preceding_keyframe_ms(self.keyframes_ms, time_ms) <= self.position_ms
+
+    def average_decode_ms(self):
+        return 1000.0 * self.decode_seconds / self.decode_count if self.decode_count else 0.0
+
+    def _frame_ms(self):
+        return 1000.0 / self.fps if self.fps and self.fps > 0 else FALLBACK_FRAME_MS
+
+    def _read_frame(self, time_ms, display_size, keep_recent):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+class OpenCVFrameSource(FrameSource):
+    name = "opencv"
+
+    def __init__(self, video_path, fps):
+        super().__init__(video_path, fps)
+        self.cap = cv2.VideoCapture(self.video_path)
+        if not self.cap.isOpened():
+            raise IOError(f"Could not open video with OpenCV: {self.video_path}")
+        self.scaler = FrameScaler()
+
+    def _read_frame(self, time_ms, display_size, keep_recent):
+        half_frame_ms = self._frame_ms() / 2
+        if not self._continues_forward(time_ms):
+            self.position_ms = None
+            if not self.keyframes_ms:
+                # Plain (often inexact) OpenCV time seek: show whatever frame it lands on
+                if not self.cap.set(cv2.CAP_PROP_POS_MSEC, float(time_ms)):
+                     print(f"WARN: cap.set(cv2.CAP_PROP_POS_MSEC, {float(time_ms)}) returned False")
+                return self._retrieve(display_size) if self.cap.grab() else None
+            # Seek to the keyframe at or before the target, then decode forward to the exact frame
+            self.cap.set(cv2.CAP_PROP_POS_MSEC, float(preceding_keyframe_ms(self.keyframes_ms, time_ms)))
+
+        # grab() decodes without the colour conversion; only frames that are shown or kept are retrieved
+        ring_start_ms = time_ms - RECENT_FRAMES_RING_SIZE * self._frame_ms()
+        for _ in range(MAX_FORWARD_DECODE_FRAMES):
+            if not self.cap.grab():
+                self.position_ms = None
+                return None
+            position_ms = self.cap.get(cv2.CAP_PROP_POS_MSEC)
+            if position_ms + half_frame_ms >= time_ms:
+                break
+            if keep_recent and position_ms >= ring_start_ms:
+                self.position_ms = position_ms
+                rgb_frame = self._retrieve(display_size)
+                if rgb_frame is not None: self._remember_frame(position_ms, rgb_frame)
+        return self._retrieve(display_size)
+
+    def _retrieve(self, display_size):
+        ret, frame = self.cap.retrieve(self.scaler.frame_buffer)
+        if not ret:
+            self.position_ms = None
+            return None
+        self.scaler.frame_buffer = frame
+        self.position_ms = self.cap.get(cv2.CAP_PROP_POS_MSEC)
+        return self.scaler.to_display_rgb(frame, display_size)
+
+    def close(self):
+        self.cap.release()
+
+class FFmpegFrameSource(FrameSource):
+    # Keeps one ffmpeg process streaming scaled rgb24 frames from the last seek position. "-ss" before "-i" seeks
+    # to the preceding keyframe and decodes to the exact time inside ffmpeg; small forward moves just read on.
+    name = "ffmpeg"
+
+    def __init__(self, video_path, fps):
+        super().__init__(video_path, fps)
+        self.ffmpeg_command = get_ffmpeg_command()
+        if not self.ffmpeg_command:
+            raise IOError(tool_not_found_message("ffmpeg", FFMPEG_PATH))
+        self.process = None
+        self.process_size = None
+        self.frame_buffer = None
+
+    def _read_frame(self, time_ms, display_size, keep_recent):
+        frame_ms = self._frame_ms()
+        if self.process is None or self.process_size != display_size or self.position_ms is None or \
+           not (self.position_ms + frame_ms / 2 < time_ms <= self.position_ms + FFMPEG_PIPE_FORWARD_MS):
+            self._start(time_ms, display_size)
+            self.position_ms = time_ms - frame_ms # The first frame out of the pipe is the one at time_ms
+        ring_start_ms = time_ms - RECENT_FRAMES_RING_SIZE * frame_ms
+        for _ in range(MAX_FORWARD_DECODE_FRAMES):
+            if not self._read_raw_frame():
+                self._stop()
+                return None
+            self.position_ms += frame_ms
+            if self.position_ms + frame_ms / 2 >= time_ms:
+                break
+            if keep_recent and self.position_ms >= ring_start_ms:
+                self._remember_frame(self.position_ms, self.frame_buffer)
+        return self.frame_buffer
+
+    def _start(self, time_ms, display_size):
+        self._stop()
+        width, height = display_size
+        command = [self.ffmpeg_command, "-hide_banner", "-loglevel", "error", "-nostdin",
+                   "-ss", f"{max(0, time_ms) / 1000.0:.3f}", "-i", self.video_path,
+                   "-map", "0:v:0", "-an", "-sn", "-vf", f"scale={width}:{height}:flags=area",
+                   "-pix_fmt", "rgb24", "-f", "rawvideo", "pipe:1"]
+        creationflags = subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
+        self.process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                        startupinfo=hidden_startupinfo(), creationflags=creationflags)
+        self.process_size = display_size
+        if self.frame_buffer is None or self.frame_buffer.shape != (height, width, 3):
+            self.frame_buffer = np.empty((height, width, 3), dtype=np.uint8)
+
+    def _read_raw_frame(self):
+        view = memoryview(self.frame_buffer).cast("B")
+        received = 0
+        while received < len(view):
+            count = self.process.stdout.readinto(view[received:])
+            if not count:
+                return False # End of video or ffmpeg failed
+            received += count
+        return True
+
+    def _stop(self):
+        process, self.process = self.process, None
+        self.position_ms = None
+        if process:
+            try:
+                process.kill()
+                process.stdout.close()
+                process.wait(timeout=1)
+            except Exception:
+                pass
+
+    def close(self):
+        self._stop()
+
+def open_frame_source(backend, video_path, fps):
+    source_class = {"opencv": OpenCVFrameSource, "ffmpeg": FFmpegFrameSource}.get(backend, OpenCVFrameSource)
+    return source_class(video_path, fps)
+
+
+# --- Thumbnails of the input folder ---
+# One representative frame per video, stored as a small JPEG in cache/thumbnails/. The file name hashes the path
+# together with size and mtime, so a replaced video simply gets a new thumbnail.
+THUMBNAIL_CACHE_DIR = CACHE_DIR / "thumbnails"
+THUMBNAIL_SIZE = (160, 90)
+THUMBNAIL_POSITION = 0.1 # Fraction of the duration; the very first frame is often black
+THUMBNAIL_WORKERS = 4
+
+def thumbnail_cache_file(video_path):
+    fingerprint = file_fingerprint(video_path)
+    key = f"{os.path.normcase(os.path.abspath(str(video_path)))}|{fingerprint['size']}|{fingerprint['mtime_ns']}"
+    return THUMBNAIL_CACHE_DIR / (hashlib.sha1(key.encode("utf-8")).hexdigest() + ".jpg")
+
+def decode_thumbnail(video_path, duration_ms):
+    cap = cv2.VideoCapture(str(video_path))
+    try:
+        if not cap.isOpened():
+            raise IOError(f"Could not open video with OpenCV: {video_path}")
+        if duration_ms > 0:
+            cap.set(cv2.CAP_PROP_POS_MSEC, float(duration_ms * THUMBNAIL_POSITION))
+        ret, frame = cap.read()
+        if not ret and duration_ms > 0:
+            cap.set(cv2.CAP_PROP_POS_MSEC, 0.0)
+            ret, frame = cap.read()
+        if not ret:
+            raise IOError(f"Could not decode a frame from {video_path}")
+    finally:
+        cap.release()
+    size = fit_size(frame.shape[1], frame.shape[0], *THUMBNAIL_SIZE)
+    return cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+
+def get_thumbnail(video_path):
+    # RGB thumbnail array; decoded on the first request for this version of the file, read from disk afterwards
+    cache_file = thumbnail_cache_file(video_path)
+    try:
+        # imdecode/fromfile instead of imread/imwrite: OpenCV's file functions fail on non-ASCII paths on Windows
+        thumbnail = cv2.imdecode(np.fromfile(str(cache_file), dtype=np.uint8), cv2.IMREAD_COLOR)
+        if thumbnail is not None:
+            return cv2.cvtColor(thumbnail, cv2.COLOR_BGR2RGB)
+    except Exception:
+        pass # Missing or unreadable thumbnail is decoded again
+
+    info = get_probe_cache().get_video_info(video_path)
+    thumbnail = decode_thumbnail(video_path, info['duration_ms'])
+    try:
+        ret, encoded = cv2.imencode(".jpg", thumbnail, [cv2.IMWRITE_JPEG_QUALITY, 85])
+        if ret:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_file.with_suffix(".jpg.tmp")
+            encoded.tofile(str(tmp_path))
+            os.replace(tmp_path, cache_file)
+    except Exception as e:
+        print(f"WARN: Could not write thumbnail {cache_file}: {e}")
+    return cv2.cvtColor(thumbnail, cv2.COLOR_BGR2RGB)
+
+class ThumbnailLoader:
+    # Small thread pool shared by the thumbnail strip and the next-video prefetch. result_callback(video_path, rgb)
+    # is called from a pool thread, with rgb None when the video could not be decoded.
+    def __init__(self, result_callback, max_workers=THUMBNAIL_WORKERS):
+        self.result_callback = result_callback
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="Thumbnail")
+        self.requested = set()
+        self.pending_futures = set() # Cancelled by close()
+        self.futures_lock = threading.Lock()
+        self.closed = False
+
+    def request(self, video_path):
+        video_path = str(video_path)
+        if self.closed or video_path in self.requested: return
+        self.requested.add(video_path)
+        self._submit(self._load, video_path)
+
+    def submit(self, function, *args):
+        # Other background work (e.g. prefetching) that should not delay a decode on the preview worker
+        if not self.closed:
+            self._submit(function, *args)
+
+    def _submit(self, function, *args):
+        future = self.executor.submit(function, *args)
+        with self.futures_lock:
+            self.pending_futures.add(future)
+        future.add_done_callback(self._forget_future)
+
+    def _forget_future(self, future):
+        with self.futures_lock:
+            self.pending_futures.discard(future)
+
+    def _load(self, video_path):
+        if self.closed: return
+        try:
+            rgb_thumbnail = get_thumbnail(video_path)
+        except Exception as e:
+            print(f"WARN: Thumbnail failed for {video_path}: {e}")
+            rgb_thumbnail = None
+        if not self.closed:
+            self.result_callback(video_path, rgb_thumbnail)
+
+    def close(self):
+        # shutdown(cancel_futures=True) needs Python 3.9, so queued work is cancelled here
+        self.closed = True
+        with self.futures_lock:
+            pending_futures = list(self.pending_futures)
+        for future in pending_futures: future.cancel()
+        self.executor.shutdown(wait=False)